@@ -0,0 +1,515 @@
+import argparse
+import datetime
+import json
+import math
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import mpmath
+import numpy as np
+import pvlib
+
+# from ivcurves repo
+import utils
+from utils import mp
+import precise
+import compare_curves
+
+
+SUBMISSIONS_DIR = f'{pathlib.Path(__file__).parent}/../submissions'
+# number of points on the curves of lambert_i_from_v and lambert_v_from_i
+# benchmarks
+NUM_LAMBERT_PTS = 10
+# a benchmark is a regression if its time grows by more than this fraction
+REGRESSION_THRESHOLD = 0.1
+# each repeat of a benchmark runs its cases for at least this many seconds
+MIN_REPEAT_SECONDS = 0.5
+STATISTICS = ('min', 'median', 'mean')
+
+
+###################
+# Benchmark cases #
+###################
+
+
+def get_submission_parameter_sets(submission_directory):
+    r"""
+    Runs a submission in a temporary directory and reads the fitted parameters
+    it writes, like the score-all-submissions job of the update-scores
+    workflow does.
+
+    Parameters
+    ----------
+    submission_directory : str
+        A submission's directory, with a ``pr_config.json`` file whose
+        ``SUBMISSION_MAIN`` is the submission's main script.
+
+    Returns
+    -------
+    dict
+        A dictionary of test set filenames (excluding file extensions) to the
+        submission's fitted parameter sets of the test set. (See
+        :func:`utils.read_iv_curve_parameter_sets`)
+    """
+    submission_directory = pathlib.Path(submission_directory).resolve()
+    with open(submission_directory / 'pr_config.json', 'r') as file:
+        main_path = submission_directory / json.load(file)['SUBMISSION_MAIN']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        subprocess.run([sys.executable, str(main_path)], cwd=tmp_dir, check=True)
+        return {name: utils.read_iv_curve_parameter_sets(f'{tmp_dir}/{name}')
+                for name in utils.get_filenames_in_directory(tmp_dir)}
+
+
+def get_benchmark_cases(test_set_names, submission_directories):
+    r"""
+    Makes the cases that every benchmark is timed on, in groups.
+
+    There is one group for each test set, whose cases are the test set's test
+    cases fitted exactly. There is also one group for each submission, whose
+    cases are the test cases of every test set it has fitted parameters for.
+
+    Parameters
+    ----------
+    test_set_names : list of str
+        Test set filenames (excluding file extensions) in
+        ``utils.TEST_SETS_DIR``.
+
+    submission_directories : list of str
+        Directories of submissions. (See
+        :func:`get_submission_parameter_sets`)
+
+    Returns
+    -------
+    dict
+        A dictionary of group names to lists of ``(known_curve_params,
+        fitted_curve_params)`` pairs. Benchmarks of a single IV curve use the
+        fitted parameters.
+    """
+    known_parameter_sets = {
+        name: utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
+        for name in test_set_names
+    }
+    groups = {}
+    for name in test_set_names:
+        groups[name] = [(p, p) for p in known_parameter_sets[name].values()]
+    for directory in submission_directories:
+        fitted_parameter_sets = get_submission_parameter_sets(directory)
+        groups[pathlib.Path(directory).name] = [
+            (known_p, fitted_parameter_sets[name][idx])
+            for name in test_set_names if name in fitted_parameter_sets
+            for idx, known_p in known_parameter_sets[name].items()
+        ]
+    return groups
+
+
+
+##############
+# Benchmarks #
+##############
+
+
+def bench_lambert_i_from_v(known_curve_params, fitted_curve_params, vth, atol,
+                           num_pts, num_compare_pts):
+    r"""
+    Returns a function that calculates the currents of ``NUM_LAMBERT_PTS``
+    evenly spaced voltages from zero to :math:`V_{oc}` with
+    :func:`precise.lambert_i_from_v`.
+
+    The benchmark functions take the same parameters. ``known_curve_params``
+    and ``fitted_curve_params`` are a benchmark case (see
+    :func:`get_benchmark_cases`), and ``num_pts`` and ``num_compare_pts`` are
+    the numbers of points of the curves of :mod:`precise` and
+    :mod:`compare_curves`.
+    """
+    il, io, rs, rsh, n, ns = fitted_curve_params
+    v_oc = precise.lambert_v_from_i(0, il, io, rs, rsh, n, vth, ns)
+    vv = mp.linspace(0, v_oc, NUM_LAMBERT_PTS)
+    return lambda: [precise.lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns)
+                    for v in vv]
+
+
+def bench_lambert_v_from_i(known_curve_params, fitted_curve_params, vth, atol,
+                           num_pts, num_compare_pts):
+    r"""
+    Returns a function that calculates the voltages of ``NUM_LAMBERT_PTS``
+    evenly spaced currents from zero to :math:`I_{sc}` with
+    :func:`precise.lambert_v_from_i`.
+    """
+    il, io, rs, rsh, n, ns = fitted_curve_params
+    i_sc = precise.lambert_i_from_v(0, il, io, rs, rsh, n, vth, ns)
+    ii = mp.linspace(0, i_sc, NUM_LAMBERT_PTS)
+    return lambda: [precise.lambert_v_from_i(i, il, io, rs, rsh, n, vth, ns)
+                    for i in ii]
+
+
+def bench_get_precise_i(known_curve_params, fitted_curve_params, vth, atol,
+                        num_pts, num_compare_pts):
+    r"""
+    Returns a function that calculates a curve of ``num_pts`` points with
+    :func:`precise.get_precise_i`.
+    """
+    il, io, rs, rsh, n, ns = fitted_curve_params
+    return lambda: precise.get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts)
+
+
+def bench_max_power_pt_finder(known_curve_params, fitted_curve_params, vth, atol,
+                              num_pts, num_compare_pts):
+    r"""
+    Returns a function that finds the maximum power point with
+    :func:`precise.max_power_pt_finder`.
+    """
+    il, io, rs, rsh, n, ns = fitted_curve_params
+    return lambda: precise.max_power_pt_finder(il, io, rs, rsh, n, vth, ns, atol)
+
+
+def bench_find_x_intersection(known_curve_params, fitted_curve_params, vth, atol,
+                              num_pts, num_compare_pts):
+    r"""
+    Returns a function that finds the intersections of the known curve with
+    the lines through the points of the fitted curve with
+    :func:`compare_curves.find_x_intersection`, like
+    :func:`compare_curves.total_score` does.
+    """
+    known_curve = compare_curves.KnownCurve(known_curve_params, vth,
+                                            num_compare_pts, atol)
+    fit_xs, fit_ys = compare_curves.get_curve(fitted_curve_params, vth,
+                                              num_compare_pts, atol)
+    return lambda: [
+        compare_curves.find_x_intersection(known_curve.single_diode, known_curve.xs,
+                                           known_curve.ys, v, i, num_compare_pts,
+                                           atol, segments=known_curve.segments)
+        for v, i in zip(fit_xs, fit_ys)
+    ]
+
+
+def bench_total_score(known_curve_params, fitted_curve_params, vth, atol,
+                      num_pts, num_compare_pts):
+    r"""
+    Returns a function that scores the fitted parameters with
+    :func:`compare_curves.total_score`, including calculating both curves.
+    """
+    return lambda: compare_curves.total_score(known_curve_params, fitted_curve_params,
+                                              vth, num_compare_pts, atol)
+
+
+BENCHMARKS = {
+    'lambert_i_from_v': bench_lambert_i_from_v,
+    'lambert_v_from_i': bench_lambert_v_from_i,
+    'get_precise_i': bench_get_precise_i,
+    'max_power_pt_finder': bench_max_power_pt_finder,
+    'find_x_intersection': bench_find_x_intersection,
+    'total_score': bench_total_score,
+}
+
+
+
+##################
+# Run benchmarks #
+##################
+
+
+def time_benchmark(benchmark, cases, vth, atol, num_pts, num_compare_pts, repeat):
+    r"""
+    Times a benchmark on a group of cases.
+
+    Parameters
+    ----------
+    benchmark : function
+        A function of :data:`BENCHMARKS`.
+
+    cases : list
+        A group of cases. (See :func:`get_benchmark_cases`)
+
+    vth, atol, num_pts, num_compare_pts
+        See :func:`bench_lambert_i_from_v`.
+
+    repeat : int
+        Number of times every case is run.
+
+    Returns
+    -------
+    dict
+        ``times``, the seconds taken to run every case once, for each repeat,
+        its ``min``, ``median``, and ``mean``, ``number``, the number of
+        times every case is run in each repeat, ``num_cases``, and
+        ``num_errors``, the number of cases that raised an exception.
+
+    Notes
+    -----
+    Like :mod:`timeit`, the cases are run once before they are timed, and
+    each repeat runs them enough times to take at least
+    ``MIN_REPEAT_SECONDS``. Cases that raise an exception are timed until they
+    raise it, since submissions whose curves cannot be scored must fail
+    quickly too.
+    """
+    runs = []
+    num_errors = 0
+    for known_p, fitted_p in cases:
+        try:
+            runs.append(benchmark(known_p, fitted_p, vth, atol, num_pts, num_compare_pts))
+        except Exception:
+            num_errors += 1
+
+    def run_all():
+        elapsed, run_errors = 0, 0
+        for run in runs:
+            start = time.perf_counter()
+            try:
+                run()
+            except Exception:
+                run_errors += 1
+            elapsed += time.perf_counter() - start
+        return elapsed, run_errors
+
+    elapsed, run_errors = run_all()
+    number = max(1, math.ceil(MIN_REPEAT_SECONDS / elapsed)) if elapsed > 0 else 1
+    times = [sum(run_all()[0] for _ in range(number)) / number for _ in range(repeat)]
+    return {'times': times, 'min': min(times), 'median': statistics.median(times),
+            'mean': statistics.mean(times), 'number': number,
+            'num_cases': len(cases), 'num_errors': num_errors + run_errors}
+
+
+def get_metadata():
+    r"""
+    Describes the environment the benchmarks are run in.
+
+    Returns
+    -------
+    dict
+        The date, git commit, platform, versions of Python and of the
+        numerical libraries, and ``mp.dps``.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, cwd=pathlib.Path(__file__).parent,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'mpmath': mpmath.__version__,
+        'numpy': np.__version__,
+        'pvlib': pvlib.__version__,
+        'dps': mp.dps,
+    }
+
+
+def run_benchmarks(benchmark_names, groups, vth, atol, num_pts, num_compare_pts,
+                   repeat=5, verbose=False):
+    r"""
+    Times benchmarks on groups of cases.
+
+    Parameters
+    ----------
+    benchmark_names : list of str
+        Names of benchmarks in :data:`BENCHMARKS`.
+
+    groups : dict
+        Groups of cases. (See :func:`get_benchmark_cases`)
+
+    vth, atol, num_pts, num_compare_pts
+        See :func:`bench_lambert_i_from_v`.
+
+    repeat : int, default 5
+        Number of times every case is run.
+
+    verbose : bool, default False
+        Print each benchmark's time as it finishes.
+
+    Returns
+    -------
+    dict
+        ``metadata`` (see :func:`get_metadata`) and ``benchmarks``, a
+        dictionary of ``'<benchmark>[<group>]'`` to the benchmark's times on
+        the group. (See :func:`time_benchmark`)
+    """
+    results = {'metadata': get_metadata(), 'benchmarks': {}}
+    for benchmark_name in benchmark_names:
+        for group_name, cases in groups.items():
+            name = f'{benchmark_name}[{group_name}]'
+            result = time_benchmark(BENCHMARKS[benchmark_name], cases, vth, atol,
+                                    num_pts, num_compare_pts, repeat)
+            results['benchmarks'][name] = result
+            if verbose:
+                print(f'{name}: {result["min"]:.4f} s', file=sys.stderr)
+    return results
+
+
+
+###################
+# Compare results #
+###################
+
+
+def compare_results(baseline, results, threshold=REGRESSION_THRESHOLD,
+                    statistic='min'):
+    r"""
+    Compares benchmark results with a baseline.
+
+    Parameters
+    ----------
+    baseline : dict
+        Benchmark results of :func:`run_benchmarks`.
+
+    results : dict
+        Benchmark results of :func:`run_benchmarks` to compare with
+        ``baseline``.
+
+    threshold : float, default REGRESSION_THRESHOLD
+        A benchmark is a regression if its time is more than
+        ``1 + threshold`` times its baseline time, and an improvement if its
+        baseline time is more than ``1 + threshold`` times its time.
+
+    statistic : str, default 'min'
+        The statistic of the times compared. One of :data:`STATISTICS`.
+
+    Returns
+    -------
+    list of tuple
+        A ``(name, baseline_time, time, ratio, status)`` tuple for every
+        benchmark of either result. ``status`` is one of ``'regression'``,
+        ``'improvement'``, ``'ok'``, ``'errors changed'`` (the number of cases
+        that raised an exception changed), ``'new'``, or ``'missing'``.
+        Times and the ratio are None when they do not exist.
+    """
+    rows = []
+    base_benchmarks, new_benchmarks = baseline['benchmarks'], results['benchmarks']
+    for name in {**base_benchmarks, **new_benchmarks}:
+        base, new = base_benchmarks.get(name), new_benchmarks.get(name)
+        if base is None:
+            rows.append((name, None, new[statistic], None, 'new'))
+            continue
+        if new is None:
+            rows.append((name, base[statistic], None, None, 'missing'))
+            continue
+        base_time, new_time = base[statistic], new[statistic]
+        ratio = new_time / base_time if base_time > 0 else float('inf')
+        if base['num_errors'] != new['num_errors']:
+            status = 'errors changed'
+        elif ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((name, base_time, new_time, ratio, status))
+    return rows
+
+
+def format_comparison(rows):
+    r"""
+    Formats the rows of :func:`compare_results` as a table.
+
+    Returns
+    -------
+    str
+    """
+    fmt = lambda t, width, precision: (f'{"-":>{width}}' if t is None
+                                       else f'{t:>{width}.{precision}f}')
+    width = max([len(row[0]) for row in rows] + [len('benchmark')])
+    lines = [f'{"benchmark":<{width}}  {"baseline":>10}  {"new":>10}  {"ratio":>7}  status']
+    for name, base_time, new_time, ratio, status in rows:
+        lines.append(f'{name:<{width}}  {fmt(base_time, 10, 4)}  '
+                     f'{fmt(new_time, 10, 4)}  {fmt(ratio, 7, 3)}  {status}')
+    return '\n'.join(lines)
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(
+        description='Times the numerical hot paths of precise.py and '
+                    'compare_curves.py, and compares the times with a '
+                    'baseline.'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help='Run the benchmarks and save their times to a JSON file.'
+    )
+    run_parser.add_argument('output_path', type=str,
+                            help='Path of the JSON file of benchmark results.')
+    run_parser.add_argument('--benchmark', dest='benchmark_names', type=str,
+                            nargs='+', choices=list(BENCHMARKS),
+                            default=list(BENCHMARKS),
+                            help='Benchmarks to run. By default, all are run.')
+    run_parser.add_argument('--test-set', dest='test_set_filename', type=str,
+                            help='The name of a test set file in the test_sets '
+                                 'directory (excluding file extensions). If '
+                                 'omitted, all test sets are used.')
+    run_parser.add_argument('--submissions', dest='submission_directories',
+                            type=str, nargs='*',
+                            help='Submission directories whose fitted parameters '
+                                 'are benchmarked too. By default, every '
+                                 'submission in the submissions directory is '
+                                 'run and used.')
+    run_parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of times every benchmark case is run.')
+    run_parser.add_argument('--verbose', action=argparse.BooleanOptionalAction,
+                            help='Print the time of each benchmark as it '
+                                 'finishes.')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare benchmark results with a baseline. Exits with '
+                        'status 1 if any benchmark regressed.'
+    )
+    compare_parser.add_argument('baseline_path', type=str,
+                                help='Path of the JSON file of baseline '
+                                     'benchmark results.')
+    compare_parser.add_argument('results_path', type=str,
+                                help='Path of the JSON file of benchmark results '
+                                     'to compare with the baseline.')
+    compare_parser.add_argument('--threshold', type=float,
+                                default=REGRESSION_THRESHOLD,
+                                help='Fraction a benchmark time may grow by '
+                                     'before it is a regression.')
+    compare_parser.add_argument('--statistic', type=str, choices=STATISTICS,
+                                default='min',
+                                help='Statistic of the repeated times compared.')
+    return parser
+
+
+
+########
+# MAIN #
+########
+
+
+if __name__ == '__main__':
+    args = get_argparser().parse_args()
+
+    if args.command == 'run':
+        if args.test_set_filename:
+            test_set_filenames = [args.test_set_filename]
+        else:
+            test_set_filenames = sorted(utils.get_filenames_in_directory(utils.TEST_SETS_DIR))
+        submission_directories = args.submission_directories
+        if submission_directories is None:
+            submission_directories = sorted(
+                str(path) for path in pathlib.Path(SUBMISSIONS_DIR).iterdir()
+                if (path / 'pr_config.json').is_file()
+            )
+
+        constants = utils.constants()
+        groups = get_benchmark_cases(test_set_filenames, submission_directories)
+        results = run_benchmarks(args.benchmark_names, groups, constants['vth'],
+                                 constants['atol'], constants['num_pts'],
+                                 constants['num_compare_pts'], args.repeat,
+                                 args.verbose)
+        with open(args.output_path, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    elif args.command == 'compare':
+        with open(args.baseline_path, 'r') as file:
+            baseline = json.load(file)
+        with open(args.results_path, 'r') as file:
+            results = json.load(file)
+        rows = compare_results(baseline, results, args.threshold, args.statistic)
+        print(format_comparison(rows))
+        if any(status in ('regression', 'errors changed') for *_, status in rows):
+            sys.exit(1)
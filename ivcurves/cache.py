@@ -0,0 +1,407 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import numpy as np
+
+# from ivcurves repo
+import utils
+from utils import mp
+
+
+CURVES_DIR = 'curves'
+SCORES_DIR = 'scores'
+# version of precise.get_precise_i in the curve cache keys. Increment it
+# whenever a change to it changes any curve, so that cached curves are not used.
+PRECISE_CURVE_VERSION = 1
+# a full cache is evicted down to this fraction of its size limit, so that its
+# entries are scanned once per many writes instead of on every write
+EVICTION_TARGET = 0.9
+
+# running size in bytes of the entries of each entry directory this process
+# writes to (See :func:`write_entry`)
+_entry_dir_bytes = {}
+
+
+#############
+# Cache I/O #
+#############
+
+
+def mpf_to_str(num_mpf):
+    r"""
+    Converts an mpmath float to a decimal string that is converted back to the
+    same mpmath float by :func:`str_to_mpf`.
+
+    Parameters
+    ----------
+    num_mpf : numeric
+        The mpmath float. [-]
+
+    Returns
+    -------
+    str
+        A decimal string with enough significant digits to identify
+        ``num_mpf`` among the mpmath floats of precision ``mp.prec``.
+
+    Notes
+    -----
+    Values with more than ``mp.prec`` bits, such as ones calculated at a
+    larger working precision, are rounded to ``mp.prec`` bits.
+    """
+    # ceil(prec * log10(2)) + 1 digits are enough to round trip prec bits
+    digits = int(mp.ceil(mp.prec * mp.log10(2))) + 1
+    return mp.nstr(mp.mpf(num_mpf), n=digits, strip_zeros=False)
+
+
+def str_to_mpf(num_str):
+    r"""
+    Converts a decimal string made by :func:`mpf_to_str` back to an mpmath
+    float.
+
+    Parameters
+    ----------
+    num_str : str
+        The decimal string.
+
+    Returns
+    -------
+    mpmath float
+    """
+    return mp.mpf(num_str)
+
+
+def make_key(*parts):
+    r"""
+    Hashes JSON-serializable values into a cache key.
+
+    Parameters
+    ----------
+    parts
+        Values that identify a cache entry. mpmath floats must be converted
+        to strings with :func:`mpf_to_str` first.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-256 digest of ``parts``.
+    """
+    encoded = json.dumps(parts, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def read_entry(entry_dir, key):
+    r"""
+    Reads a cache entry and marks it as recently used.
+
+    Parameters
+    ----------
+    entry_dir : str
+        Directory of the cache entries.
+
+    key : str
+        The entry's key. (See :func:`make_key`)
+
+    Returns
+    -------
+    dict or None
+        The entry, or None if there is no entry for ``key``.
+    """
+    path = pathlib.Path(entry_dir) / f'{key}.json'
+    try:
+        with open(path, 'r') as file:
+            entry = json.load(file)
+        os.utime(path) # the modification time orders entries for eviction
+    except (FileNotFoundError, json.JSONDecodeError):
+        # another process may be evicting or writing the entry
+        return None
+    return entry
+
+
+def write_entry(entry_dir, key, entry, max_bytes):
+    r"""
+    Writes a cache entry, then deletes the least recently used entries if the
+    cache is larger than ``max_bytes``.
+
+    Parameters
+    ----------
+    entry_dir : str
+        Directory of the cache entries. It is made if it does not exist.
+
+    key : str
+        The entry's key. (See :func:`make_key`)
+
+    entry : dict
+        A JSON-serializable entry.
+
+    max_bytes : int
+        Size limit of the entries in ``entry_dir``.
+
+    Notes
+    -----
+    The entries are scanned on the first write of a process. After that, a
+    running size is kept, and the entries are only scanned again when it is
+    larger than ``max_bytes``, at which point they are evicted down to
+    ``EVICTION_TARGET * max_bytes``. The running size does not include the
+    entries written by other processes at the same time, so the cache can be
+    larger than ``max_bytes`` until one of them evicts entries.
+    """
+    entry_dir = pathlib.Path(entry_dir)
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    path = entry_dir / f'{key}.json'
+    # write to a temporary file first so readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(entry, file)
+    new_bytes = os.path.getsize(tmp_path)
+    try:
+        old_bytes = path.stat().st_size
+    except FileNotFoundError:
+        old_bytes = 0
+    os.replace(tmp_path, path)
+
+    if entry_dir not in _entry_dir_bytes:
+        _entry_dir_bytes[entry_dir] = evict_entries(entry_dir, max_bytes)
+        return
+    _entry_dir_bytes[entry_dir] += new_bytes - old_bytes
+    if _entry_dir_bytes[entry_dir] > max_bytes:
+        _entry_dir_bytes[entry_dir] = evict_entries(
+            entry_dir, int(EVICTION_TARGET * max_bytes)
+        )
+
+
+def evict_entries(entry_dir, max_bytes):
+    r"""
+    Deletes the least recently used cache entries until the entries in
+    ``entry_dir`` are at most ``max_bytes``.
+
+    Parameters
+    ----------
+    entry_dir : str
+        Directory of the cache entries.
+
+    max_bytes : int
+        Size limit of the entries in ``entry_dir``.
+
+    Returns
+    -------
+    int
+        Size in bytes of the entries left in ``entry_dir``.
+    """
+    entries = []
+    for path in pathlib.Path(entry_dir).glob('*.json'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total_bytes <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total_bytes -= size
+    return total_bytes
+
+
+
+###############
+# Curve cache #
+###############
+
+
+def precise_curve_key(il, io, rs, rsh, n, vth, ns, atol, num_pts):
+    r"""
+    Makes the cache key of the IV curve returned by
+    :func:`precise.get_precise_i` for the given arguments.
+
+    The parameters are the same as the ones of :func:`precise.get_precise_i`.
+    The key also depends on ``mp.dps``, the adaptive precision ladder (see
+    :func:`utils.set_adaptive_precision`), and ``PRECISE_CURVE_VERSION``.
+
+    Returns
+    -------
+    str
+        The cache key.
+    """
+    parameters = [mpf_to_str(x) for x in [il, io, rs, rsh, n, vth, ns, atol]]
+    return make_key('precise_curve', parameters, int(num_pts), mp.dps,
+                    utils.get_precision_ladder(), PRECISE_CURVE_VERSION)
+
+
+def load_precise_curve(key):
+    r"""
+    Loads an IV curve from the curve cache.
+
+    Parameters
+    ----------
+    key : str
+        The curve's key. (See :func:`precise_curve_key`)
+
+    Returns
+    -------
+    (vv, ii) : tuple of numpy arrays, or None
+        The voltages and currents of the curve as numpy arrays of mpmath
+        floats, or None if the curve cache is off or does not have the curve.
+    """
+    curve_cache = utils.get_curve_cache()
+    if curve_cache is None:
+        return None
+    cache_dir, _ = curve_cache
+    entry = read_entry(pathlib.Path(cache_dir) / CURVES_DIR, key)
+    if entry is None:
+        return None
+    return (np.fromiter(map(str_to_mpf, entry['Voltages']), dtype=mp.mpf),
+            np.fromiter(map(str_to_mpf, entry['Currents']), dtype=mp.mpf))
+
+
+def save_precise_curve(key, vv, ii):
+    r"""
+    Saves an IV curve to the curve cache, if it is on.
+
+    Parameters
+    ----------
+    key : str
+        The curve's key. (See :func:`precise_curve_key`)
+
+    vv : iterable of numeric
+        Voltages of the curve.
+
+    ii : iterable of numeric
+        Currents of the curve.
+    """
+    curve_cache = utils.get_curve_cache()
+    if curve_cache is None:
+        return
+    cache_dir, max_bytes = curve_cache
+    entry = {'Voltages': [mpf_to_str(v) for v in vv],
+             'Currents': [mpf_to_str(i) for i in ii]}
+    write_entry(pathlib.Path(cache_dir) / CURVES_DIR, key, entry, max_bytes)
+
+
+def clear_curve_cache(cache_dir):
+    r"""
+    Deletes every curve of the curve cache at ``cache_dir``.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache.
+    """
+    entry_dir = pathlib.Path(cache_dir) / CURVES_DIR
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    _entry_dir_bytes.pop(entry_dir, None)
+
+
+
+###############
+# Score cache #
+###############
+
+
+def score_key(known_curve_params, fitted_curve_params, vth, num_pts, atol,
+              scorer_version):
+    r"""
+    Makes the cache key of a test case score returned by
+    :func:`compare_curves.score_case`.
+
+    Parameters
+    ----------
+    known_curve_params : list
+        Parameters of the known IV curve in the order [il, io, rs, rsh, n, ns].
+
+    fitted_curve_params : list
+        Parameters of the fitted IV curve in the order [il, io, rs, rsh, n,
+        ns].
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+
+    num_pts : int
+        Number of points compared on each IV curve.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
+
+    scorer_version : list
+        JSON-serializable values that identify the scorer and its options. A
+        score is invalidated by changing them.
+
+    Returns
+    -------
+    str
+        The cache key. It also depends on ``mp.dps`` and the adaptive
+        precision ladder. (See :func:`utils.set_adaptive_precision`)
+    """
+    known = [mpf_to_str(x) for x in known_curve_params]
+    fitted = [mpf_to_str(x) for x in fitted_curve_params]
+    return make_key('score', known, fitted, mpf_to_str(vth), int(num_pts),
+                    mpf_to_str(atol), mp.dps, utils.get_precision_ladder(),
+                    scorer_version)
+
+
+def load_score(key):
+    r"""
+    Loads a test case score from the score cache.
+
+    Parameters
+    ----------
+    key : str
+        The score's key. (See :func:`score_key`)
+
+    Returns
+    -------
+    (score, num_steps) : tuple, or None
+        The score as an mpmath float and the number of evaluations used to
+        find it (see :func:`compare_curves.score_case`), or None if the score
+        cache is off or does not have the score.
+    """
+    score_cache = utils.get_score_cache()
+    if score_cache is None:
+        return None
+    cache_dir, _ = score_cache
+    entry = read_entry(pathlib.Path(cache_dir) / SCORES_DIR, key)
+    if entry is None:
+        return None
+    return str_to_mpf(entry['score']), entry['num_steps']
+
+
+def save_score(key, score, num_steps):
+    r"""
+    Saves a test case score to the score cache, if it is on.
+
+    Parameters
+    ----------
+    key : str
+        The score's key. (See :func:`score_key`)
+
+    score : numeric
+        The test case's score.
+
+    num_steps : int
+        Number of evaluations used to find the score.
+    """
+    score_cache = utils.get_score_cache()
+    if score_cache is None:
+        return
+    cache_dir, max_bytes = score_cache
+    entry = {'score': mpf_to_str(score), 'num_steps': int(num_steps)}
+    write_entry(pathlib.Path(cache_dir) / SCORES_DIR, key, entry, max_bytes)
+
+
+def clear_score_cache(cache_dir):
+    r"""
+    Deletes every score of the score cache at ``cache_dir``.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache.
+    """
+    entry_dir = pathlib.Path(cache_dir) / SCORES_DIR
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    _entry_dir_bytes.pop(entry_dir, None)
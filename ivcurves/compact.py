@@ -0,0 +1,362 @@
+import argparse
+import collections.abc
+import decimal
+import hashlib
+import json
+import os
+import pathlib
+import struct
+import numpy as np
+
+# from ivcurves repo
+import utils
+from utils import mp
+
+
+MAGIC = b'IVCURVES'
+FORMAT_VERSION = 2
+# magic, format version, header length
+PREAMBLE = struct.Struct('<8sII')
+# each point of a curve is a voltage and a current stored as
+# mantissa * 10**exponent, which is the exact value of their JSON strings.
+# The mantissa is split into two int64 limbs, mantissa = high * MANTISSA_BASE
+# + low, since a JSON string can have more significant digits than an int64
+MANTISSA_BASE = 10**18
+MAX_MANTISSA = 10**36 - 1
+POINT_DTYPE = np.dtype([('v_high', '<i8'), ('v_low', '<i8'),
+                        ('i_high', '<i8'), ('i_low', '<i8'),
+                        ('v_exponent', 'i1'), ('i_exponent', 'i1')])
+
+
+#####################
+# Compact test sets #
+#####################
+
+
+def get_compact_path(test_set_filename):
+    r"""
+    Returns the path of the compact companion of a test set JSON file.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    Returns
+    -------
+    str
+        The path of the compact file. It has a single file extension, so
+        that it does not add a test set to
+        :func:`utils.get_filenames_in_directory`.
+    """
+    return f'{test_set_filename}.bin'
+
+
+def get_json_digest(test_set_filename):
+    r"""
+    Hashes a test set JSON file, so that a compact file made from an older
+    version of it is not used.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    Returns
+    -------
+    str
+        A hexadecimal SHA-256 digest of the JSON file.
+    """
+    sha256 = hashlib.sha256()
+    with open(f'{test_set_filename}.json', 'rb') as file:
+        for chunk in iter(lambda: file.read(2**20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def str_to_decimal_pair(num_str):
+    r"""
+    Converts a decimal string to integers ``(mantissa, exponent)`` such that
+    its value is exactly ``mantissa * 10**exponent``.
+
+    Parameters
+    ----------
+    num_str : str
+        The decimal string, such as one made by
+        :func:`utils.mp_nstr_precision_func`.
+
+    Returns
+    -------
+    (mantissa, exponent) : tuple of int
+
+    Raises
+    ------
+    ValueError
+        If the mantissa has more than 36 significant digits (see
+        ``MAX_MANTISSA``), or the exponent does not fit in the columns of
+        ``POINT_DTYPE``.
+    """
+    try:
+        # normalize in a context wide enough that it does not round
+        context = decimal.Context(prec=len(num_str))
+        sign, digits, exponent = decimal.Decimal(num_str).normalize(context).as_tuple()
+    except decimal.InvalidOperation:
+        raise ValueError(f'{num_str!r} is not a decimal string') from None
+    if not isinstance(exponent, int):
+        raise ValueError(f'{num_str!r} is not finite')
+    mantissa = int(''.join(map(str, digits))) * (-1 if sign else 1)
+    if not (abs(mantissa) <= MAX_MANTISSA
+            and np.iinfo(np.int8).min <= exponent <= np.iinfo(np.int8).max):
+        raise ValueError(f'{num_str!r} has too many significant digits')
+    return mantissa, exponent
+
+
+def decimal_pair_to_mpf(mantissa, exponent):
+    r"""
+    Converts ``(mantissa, exponent)`` made by :func:`str_to_decimal_pair` to
+    the same mpmath float that ``mp.mpmathify`` makes from the decimal
+    string.
+
+    Parameters
+    ----------
+    mantissa : int
+
+    exponent : int
+
+    Returns
+    -------
+    mpmath float
+    """
+    return mp.mpf(f'{int(mantissa)}e{int(exponent)}')
+
+
+def write_compact_test_set(test_set_filename):
+    r"""
+    Writes the compact companion of a test set JSON file written by
+    :func:`precise.write_test_set_json`.
+
+    The JSON file stays the canonical format. The compact file stores the
+    ``'Voltages'`` and ``'Currents'`` of every test case as columns of
+    integers (see ``POINT_DTYPE``), and the other values of the JSON file in
+    a header, with the offset of each test case's points. It is read with
+    :func:`read_compact_test_set`.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension. The compact
+        file is written next to it. (See :func:`get_compact_path`)
+
+    Raises
+    ------
+    ValueError
+        If a test case's voltages and currents differ in number, or one of
+        them cannot be stored exactly. (See :func:`str_to_decimal_pair`)
+    """
+    with open(f'{test_set_filename}.json', 'r') as file:
+        test_set_json = json.load(file)
+
+    cases = []
+    points = []
+    offset = 0
+    for entry in test_set_json['IV Curves']:
+        vv, ii = entry['Voltages'], entry['Currents']
+        if len(vv) != len(ii):
+            raise ValueError(f'Index {entry["Index"]} has {len(vv)} voltages '
+                             f'and {len(ii)} currents')
+        case_points = np.empty(len(vv), dtype=POINT_DTYPE)
+        for k, (v, i) in enumerate(zip(vv, ii)):
+            (v_mantissa, v_exponent), (i_mantissa, i_exponent) = (
+                str_to_decimal_pair(v), str_to_decimal_pair(i)
+            )
+            case_points[k] = (*divmod(v_mantissa, MANTISSA_BASE),
+                              *divmod(i_mantissa, MANTISSA_BASE),
+                              v_exponent, i_exponent)
+        points.append(case_points)
+        cases.append({
+            'Index': entry['Index'], 'offset': offset, 'num_pts': len(vv),
+            'scalars': {key: value for key, value in entry.items()
+                        if key not in ('Index', 'Voltages', 'Currents')}
+        })
+        offset += len(vv)
+
+    header = json.dumps({
+        'json_sha256': get_json_digest(test_set_filename),
+        'metadata': {key: value for key, value in test_set_json.items()
+                     if key != 'IV Curves'},
+        'cases': cases
+    }).encode()
+    # pad the header so that the points start at a multiple of 8 bytes
+    header += b' ' * (-(PREAMBLE.size + len(header)) % 8)
+
+    # the temporary file has a single file extension, so that it does not add
+    # a test set to utils.get_filenames_in_directory
+    tmp_path = pathlib.Path(f'{test_set_filename}.tmp')
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            file.write(header)
+            for case_points in points:
+                file.write(case_points.tobytes())
+        os.replace(tmp_path, get_compact_path(test_set_filename))
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def read_compact_test_set(test_set_filename):
+    r"""
+    Opens the compact companion of a test set JSON file, if it is up to date.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    Returns
+    -------
+    CompactTestSet or None
+        The compact test set, or None if the compact file does not exist,
+        has another format version, or was made from another version of the
+        JSON file.
+    """
+    try:
+        compact_test_set = CompactTestSet(get_compact_path(test_set_filename))
+        json_sha256 = get_json_digest(test_set_filename)
+    except (FileNotFoundError, ValueError):
+        return None
+    if compact_test_set.json_sha256 != json_sha256:
+        return None
+    return compact_test_set
+
+
+class CompactTestSet(collections.abc.Mapping):
+    r"""
+    A read-only mapping of test case indices to the test cases' entries in a
+    compact file written by :func:`write_compact_test_set`.
+
+    The points of the file are memory-mapped, and an entry's ``'Voltages'``
+    and ``'Currents'`` are :class:`CompactColumn` sequences, which make
+    mpmath floats only for the points that are indexed. The other values of
+    an entry are the same as in the JSON file. So an entry can be used in
+    place of the test case's entry from :func:`utils.read_iv_curve_json`.
+
+    Parameters
+    ----------
+    compact_path : str
+        Path of the compact file.
+
+    Attributes
+    ----------
+    json_sha256 : str
+        Digest of the JSON file the compact file was made from. (See
+        :func:`get_json_digest`)
+
+    metadata : dict
+        The values of the JSON file other than ``'IV Curves'``.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a compact file of version ``FORMAT_VERSION``.
+    """
+
+    def __init__(self, compact_path):
+        with open(compact_path, 'rb') as file:
+            preamble = file.read(PREAMBLE.size)
+            if len(preamble) != PREAMBLE.size:
+                raise ValueError(f'{compact_path} is not a compact file')
+            magic, version, header_len = PREAMBLE.unpack(preamble)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f'{compact_path} is not a compact file of '
+                                 f'version {FORMAT_VERSION}')
+            header = json.loads(file.read(header_len))
+
+        self.json_sha256 = header['json_sha256']
+        self.metadata = header['metadata']
+        self._cases = {case['Index']: case for case in header['cases']}
+        num_points = sum(case['num_pts'] for case in header['cases'])
+        if num_points == 0:
+            self._points = np.empty(0, dtype=POINT_DTYPE)
+        else:
+            self._points = np.memmap(compact_path, dtype=POINT_DTYPE, mode='r',
+                                     offset=PREAMBLE.size + header_len,
+                                     shape=(num_points,))
+
+    def __getitem__(self, idx):
+        case = self._cases[idx]
+        points = self._points[case['offset']:case['offset'] + case['num_pts']]
+        return {
+            'Index': case['Index'],
+            'Voltages': CompactColumn(points['v_high'], points['v_low'],
+                                      points['v_exponent']),
+            'Currents': CompactColumn(points['i_high'], points['i_low'],
+                                      points['i_exponent']),
+            **case['scalars']
+        }
+
+    def __iter__(self):
+        return iter(self._cases)
+
+    def __len__(self):
+        return len(self._cases)
+
+
+class CompactColumn(collections.abc.Sequence):
+    r"""
+    A read-only sequence of the voltages or currents of a test case in a
+    compact file, which makes mpmath floats only for the items that are
+    indexed. (See :func:`decimal_pair_to_mpf`)
+
+    Parameters
+    ----------
+    highs : numpy array of int
+        The high limbs of the mantissas. (See ``MANTISSA_BASE``)
+
+    lows : numpy array of int
+        The low limbs of the mantissas.
+
+    exponents : numpy array of int
+    """
+
+    def __init__(self, highs, lows, exponents):
+        self._highs = highs
+        self._lows = lows
+        self._exponents = exponents
+
+    def _get_mpf(self, high, low, exponent):
+        return decimal_pair_to_mpf(int(high) * MANTISSA_BASE + int(low), exponent)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._get_mpf(*point) for point in
+                    zip(self._highs[key], self._lows[key], self._exponents[key])]
+        return self._get_mpf(self._highs[key], self._lows[key], self._exponents[key])
+
+    def __len__(self):
+        return len(self._highs)
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(
+        description='Writes the compact companions of test set JSON files, '
+                    'which load faster than the JSON files. The JSON files '
+                    'stay the canonical format.'
+    )
+    parser.add_argument('--test-set', dest='test_set_filename', type=str,
+                        help='The name of a test set in '
+                             f'{utils.TEST_SETS_DIR} (excluding file '
+                             'extensions). If omitted, every test set is '
+                             'written.')
+    return parser
+
+
+if __name__ == '__main__':
+    args = get_argparser().parse_args()
+
+    if args.test_set_filename:
+        test_set_filenames = [args.test_set_filename]
+    else:
+        test_set_filenames = utils.get_filenames_in_directory(utils.TEST_SETS_DIR)
+
+    for name in test_set_filenames:
+        write_compact_test_set(f'{utils.TEST_SETS_DIR}/{name}')
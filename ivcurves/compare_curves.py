@@ -1,5 +1,12 @@
 import argparse
+import contextlib
 import csv
+import itertools
+import os
+import sys
+import traceback
+import warnings
+import numpy as np
 import pvlib
 import matplotlib.pyplot as plt
 
@@ -7,13 +14,32 @@ import matplotlib.pyplot as plt
 import utils
 from utils import mp
 import precise
+import cache
+import compact
+
+
+INTERSECTION_METHODS = ('secant', 'halley')
+# fitted ideality factors outside this range are flagged
+IDEALITY_FACTOR_RANGE = (0.5, 5)
+# fitted curves whose V_oc or I_sc differ from the known curve's by more than
+# this factor are flagged
+FITTED_CURVE_MAX_RATIO = 10
+# version of the scorer in the score cache keys. Increment it whenever a
+# change to the scorer changes any score, so that cached scores are not used.
+SCORER_VERSION = 1
+# the stats of the fitted curves are collected under this test case label,
+# since a fitted curve may be shared by many test cases (see FittedCurveMemo)
+FITTED_CURVES_STATS_CASE = 'fitted curves'
 
 
 #####################
 # Find intersection #
 #####################
 
-def find_x_intersection(single_diode, known_xs, known_ys, xp, yp, num_segments, atol, maxsteps=100):
+@utils.timed_stat
+def find_x_intersection(single_diode, known_xs, known_ys, xp, yp, num_segments, atol, maxsteps=100,
+                        segments=None, method='secant', curve_parameters=None, vth=None,
+                        return_num_steps=False):
     r"""
     Finds x-coordinate of the intersection between the known IV curve and the
     line segment from the origin to the given point :math:`(x_p, y_p)`.
@@ -52,16 +78,56 @@ def find_x_intersection(single_diode, known_xs, known_ys, xp, yp, num_segments,
         x-coordinate of the intersection point. A ``ValueError`` is thrown
         if ``atol`` is not met after ``maxsteps`` iterations.
 
+    segments : dict, optional
+        The segments of the known curve made by :func:`get_curve_segments`.
+        Passing them avoids remaking them for every fitted point.
+
+    method : str, default 'secant'
+        If 'secant', the intersection is found with the secant method of
+        ``mp.findroot``. If 'halley', it is found with
+        :func:`halley_x_intersection`, which needs ``curve_parameters`` and
+        ``vth``. The secant method is used if Halley's method cannot be
+        started from the interval found by :func:`get_guess_interval`. The
+        scores of the 'halley' method are not compatible with the ones of the
+        'secant' method. (See :func:`halley_x_intersection`)
+
+    curve_parameters : list, optional
+        The parameters of the known curve in the order [il, io, rs, rsh, n, ns].
+        Required by the 'halley' method.
+
+    vth : numeric, optional
+        Thermal voltage of the cell :math:`V_{th}` [V]. Required by the
+        'halley' method.
+
+    return_num_steps : bool, default False
+        Also return the number of evaluations of the residual of the single
+        diode equation used to find the intersection.
+
     Returns
     -------
     float
         x-coordinate of the intersection of known IV curve and line through the
-        origin and the given point.
+        origin and the given point. If ``return_num_steps`` is True, a tuple
+        of the x-coordinate and the number of evaluations is returned.
+
+    Notes
+    -----
+    If adaptive precision is on (see :func:`utils.set_adaptive_precision`),
+    the intersection is found at the cheapest working precision whose
+    x-coordinate passes the check of the residual at ``mp.dps``, except when
+    ``yp`` is zero. The known current at that intersection is compared with
+    exactly zero by :func:`find_distance`, so it is found at ``mp.dps``.
     """
+    if method not in INTERSECTION_METHODS:
+        raise ValueError(f"'{method}' is not one of {INTERSECTION_METHODS}")
+    if method == 'halley' and (curve_parameters is None or vth is None):
+        raise ValueError("the 'halley' method requires curve_parameters and vth")
+
+    num_steps = 0
     if xp == 0:
         # then line through origin and (`xp`, `yp`) sits on y-axis
         # so x coordinate at intersection must be zero
-        return 0
+        x_int = 0
 
     else:
         # line through origin and (`xp`, `yp`) has a defined slope
@@ -69,22 +135,280 @@ def find_x_intersection(single_diode, known_xs, known_ys, xp, yp, num_segments,
 
         # solve for intersection of line and single_diode
         solve_for_zero = lambda x : single_diode(x, line(x)) - line(x)
-        guess_int = get_guess_interval(known_xs, known_ys, (xp, yp), num_segments)
-        try:
-            # setting tol=atol**2 because findroot checks |func(zero)|**2 < tol
-            x_int = mp.findroot(solve_for_zero, guess_int, tol=atol**2,
-                                maxsteps=maxsteps)
-        except ValueError as e:
-            raise ValueError("Can't find an intersection point. "
-                             'Perhaps the curves are too far from each other? '
-                             f'{e}')
+        guess_int = get_guess_interval(known_xs, known_ys, (xp, yp), num_segments,
+                                       segments)
+
+        def solve():
+            nonlocal num_steps
+            x_int = None
+            if method == 'halley':
+                try:
+                    x_int, steps = halley_x_intersection(curve_parameters, vth, xp, yp,
+                                                         guess_int, atol, maxsteps)
+                    num_steps += steps
+                except ValueError:
+                    # the interval does not bracket the intersection
+                    utils.count_retry('halley_x_intersection fallbacks')
+
+            if x_int is None:
+                def counted_solve_for_zero(x):
+                    nonlocal num_steps
+                    num_steps += 1
+                    utils.count_stat('mp.findroot evaluations')
+                    return solve_for_zero(x)
+
+                utils.count_stat('mp.findroot calls')
+                try:
+                    # setting tol=atol**2 because findroot checks |func(zero)|**2 < tol
+                    x_int = mp.findroot(counted_solve_for_zero, guess_int, tol=atol**2,
+                                        maxsteps=maxsteps)
+                except ValueError as e:
+                    raise ValueError("Can't find an intersection point. "
+                                     'Perhaps the curves are too far from each other? '
+                                     f'{e}')
+            return x_int
+
+        is_precise_enough = lambda x_int : abs(solve_for_zero(x_int)) < atol
+        if yp == 0:
+            x_int = solve()
+        else:
+            x_int = utils.adaptive_precision('find_x_intersection', solve,
+                                             is_precise_enough)
 
-        assert abs(solve_for_zero(x_int)) < atol
+        num_steps += 1
+        assert is_precise_enough(x_int)
 
+    if return_num_steps:
+        return x_int, num_steps
     return x_int
 
 
-def get_guess_interval(known_xs, known_ys, pt_on_line, num_segments):
+def halley_x_intersection(curve_parameters, vth, xp, yp, interval, atol, maxsteps=100,
+                          x0=None, left_sign=None):
+    r"""
+    Finds the x-coordinate of the intersection between the known IV curve and
+    the line through the origin and the point :math:`(x_p, y_p)` with
+    Halley's method.
+
+    Along the line :math:`I = m V` with :math:`m = y_p / x_p`, the residual
+    of the single diode equation and its derivatives are calculated in
+    closed form. The Halley step is safeguarded by ``interval``, where the
+    residual changes sign. Whenever a step would leave the interval, the
+    interval is bisected instead.
+
+    This is an auxiliary function for :func:`find_x_intersection`.
+
+    The intersections it finds are as precise as the ones of the secant
+    method, but they are not the same mpmath floats, so scores found with it
+    are not compatible with scores found with the secant method. At the
+    :math:`V_{oc}` of a fitted curve, :func:`find_distance` adds 1 to the
+    square of the distance unless the known current at the intersection is
+    exactly zero, so a case's score can change by about 1. Scores of the two
+    methods must not be compared or mixed.
+
+    Parameters
+    ----------
+    curve_parameters : list
+        The parameters of the known curve in the order [il, io, rs, rsh, n, ns].
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    xp : float
+        x-coordinate of point on fitted curve (voltage). Must not be zero.
+
+    yp : float
+        y-coordinate of point on fitted curve (current).
+
+    interval : tuple of floats
+        The left and right x-coordinates of an interval that contains the
+        intersection. (See :func:`get_guess_interval`)
+
+    atol : float
+        The iterations stop when a step is smaller than ``atol``.
+
+    maxsteps : int, default 100
+        Maximum number of iterations. Should converge long before we hit this.
+
+    x0 : numeric, optional
+        Initial guess of the x-coordinate of the intersection. If omitted, or
+        not inside ``interval``, the iterations start where the chord between
+        the endpoints of ``interval`` crosses zero.
+
+    left_sign : int, optional
+        The sign of the residual at the left endpoint of ``interval``, if the
+        residual is already known to change sign on ``interval``. Otherwise,
+        the residual is evaluated at both endpoints to check that it does.
+
+    Returns
+    -------
+    (x_int, num_steps) : tuple
+        The x-coordinate of the intersection and the number of evaluations
+        of the residual used to find it.
+
+    Raises
+    ------
+    ValueError
+        If the residual does not change sign on ``interval``, or the
+        iterations exceed ``maxsteps``.
+
+    Notes
+    -----
+    With :math:`a = 1 + m R_s` and :math:`u = a x / (n N_s V_{th})`, the
+    residual along the line is
+
+    .. math::
+
+        f(x) = I_L - I_0 (e^u - 1) - \frac{a x}{R_{sh}} - m x,
+
+    and its derivatives are
+    :math:`f'(x) = -I_0 e^u \frac{a}{n N_s V_{th}} - \frac{a}{R_{sh}} - m` and
+    :math:`f''(x) = -I_0 e^u \left(\frac{a}{n N_s V_{th}}\right)^2`.
+    """
+    il, io, rs, rsh, n, ns = curve_parameters
+    slope = yp / xp
+    nnsvth = n*ns*vth
+    a = 1 + slope*rs
+
+    def residual(x):
+        utils.count_stat('mp.expm1 calls')
+        u = a*x / nnsvth
+        exp_term = io*mp.exp(u)
+        f = il - io*mp.expm1(u) - a*x/rsh - slope*x
+        df = -exp_term*a/nnsvth - a/rsh - slope
+        d2f = -exp_term*(a/nnsvth)**2
+        return f, df, d2f
+
+    xl, xr = mp.mpf(interval[0]), mp.mpf(interval[1])
+    num_evals = 0
+    if left_sign is None:
+        fl, fr = residual(xl)[0], residual(xr)[0]
+        num_evals += 2
+        if fl == 0:
+            return xl, num_evals
+        if fr == 0:
+            return xr, num_evals
+        if mp.sign(fl) == mp.sign(fr):
+            raise ValueError('the residual does not change sign on the interval')
+        left_sign = mp.sign(fl)
+
+    if x0 is not None and xl < x0 < xr:
+        x = mp.mpf(x0)
+    elif num_evals:
+        # start where the chord between the interval's endpoints crosses zero
+        x = xl - fl*(xr - xl)/(fr - fl)
+        if not (xl < x < xr):
+            x = (xl + xr) / 2
+    else:
+        x = (xl + xr) / 2
+
+    for _ in range(maxsteps):
+        f, df, d2f = residual(x)
+        num_evals += 1
+        if f == 0:
+            return x, num_evals
+
+        # shrink the interval where the residual changes sign
+        if mp.sign(f) == left_sign:
+            xl = x
+        else:
+            xr = x
+
+        denom = 2*df**2 - f*d2f
+        step = -2*f*df / denom if denom != 0 else None
+        if step is not None and abs(step) < atol:
+            # converged, possibly onto an endpoint of the interval
+            return x + step, num_evals
+        if step is not None and xl < x + step < xr:
+            x_next = x + step
+        else:
+            x_next = (xl + xr) / 2
+            step = x_next - x
+
+        if (xr - xl) < atol:
+            return x_next, num_evals
+        x = x_next
+
+    raise ValueError('Iterations exceeded maximum.')
+
+
+def warm_start_x_intersection(known_curve, xp, yp, prev_pt, atol, maxsteps=100):
+    r"""
+    Finds the x-coordinate of the intersection between the known IV curve and
+    the line through the origin and the point :math:`(x_p, y_p)`, starting
+    from the intersection found for the previous point of the fitted curve.
+
+    The fitted points are in order of increasing voltage, so the lines
+    through them meet the known curve in order of increasing voltage too.
+    The intersection is found with :func:`halley_x_intersection` in the
+    interval from the previous intersection to :math:`V_{oc}`, where the
+    residual is known to change sign without evaluating it. The iterations
+    start where the second order Taylor polynomial of the known curve at the
+    previous intersection meets the line.
+
+    This is an auxiliary function for :func:`total_score`.
+
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The known curve.
+
+    xp : float
+        x-coordinate of point on fitted curve (voltage).
+
+    yp : float
+        y-coordinate of point on fitted curve (current).
+
+    prev_pt : tuple of floats
+        The intersection of the known curve with the line through the previous
+        point of the fitted curve.
+
+    atol : float
+        The absolute value of the residual of the single diode equation at
+        the returned x-coordinate is less than ``atol``.
+
+    maxsteps : int, default 100
+        Maximum number of iterations.
+
+    Returns
+    -------
+    (x_int, num_steps) : tuple
+        The x-coordinate of the intersection and the number of evaluations of
+        the residual used to find it. ``x_int`` is None if the intersection
+        cannot be found from ``prev_pt``, in which case it should be found
+        with :func:`find_x_intersection`.
+    """
+    x_prev, i_prev = prev_pt
+    if xp == 0:
+        return None, 0
+    slope = yp / xp
+    # the line must be below the previous intersection and above V_oc
+    if not (slope > 0 and (x_prev == 0 or slope < i_prev / x_prev)):
+        return None, 0
+
+    # solve i_prev + di*d + d2i/2*d**2 = slope*(x_prev + d) for d > 0
+    di, d2i = known_curve.di_dv(x_prev, i_prev)
+    b, c = di - slope, i_prev - slope*x_prev
+    x0 = x_prev + 2*c / (-b + mp.sqrt(max(b**2 - 2*d2i*c, 0)))
+    try:
+        # the line is below the known curve at `x_prev` and above it at V_oc
+        x_int, num_steps = halley_x_intersection(known_curve.parameters, known_curve.vth,
+                                                 xp, yp, (x_prev, known_curve.v_oc),
+                                                 atol, maxsteps, x0=x0, left_sign=1)
+    except ValueError:
+        return None, 0
+    # checked the same way as in find_x_intersection
+    num_steps += 1
+    if not abs(known_curve.single_diode(x_int, slope*x_int) - slope*x_int) < atol:
+        return None, num_steps
+    return x_int, num_steps
+
+
+def get_guess_interval(known_xs, known_ys, pt_on_line, num_segments, segments=None):
     r"""
     Finds the interval in which the known curve intersects the given line.
 
@@ -110,243 +434,1576 @@ def get_guess_interval(known_xs, known_ys, pt_on_line, num_segments):
         crosses this particular segment, we return the x-coordinates of the
         endpoints of this segment.
 
+    segments : dict, optional
+        The segments of the known curve made by :func:`get_curve_segments`.
+        If omitted, they are made from ``known_xs`` and ``known_ys``.
+
     Returns
     -------
     tuple of mpmath floats
         The left and right x-coordinates of the interval that contains the
         intersection of the known curve with the line that passes through the
         origin and ``pt_on_line``.
+
+    Notes
+    -----
+    If the angle :math:`\arctan(I/V)` of the known curve's points decreases
+    along the curve, the line crosses the curve once, and the crossed segment
+    is found by bisection. The bisection compares the sign of the cross
+    product of ``pt_on_line`` and each point, which orders the points the same
+    way as their angles. The segments next to the found one are also checked,
+    so that the returned interval is the first one a scan of every segment
+    would return. If the angles do not decrease, every segment is scanned.
+    """
+    if segments is None:
+        segments = get_curve_segments(known_xs, known_ys)
+    pts = segments['pts']
+    num_segs = len(pts) - 1
+
+    if segments['monotone']:
+        # first segment whose right endpoint is on or below the line
+        xp, yp = pt_on_line
+        is_above_line = lambda k: xp*pts[k][1] - yp*pts[k][0] > 0
+        lo, hi = 0, num_segs - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if is_above_line(mid + 1):
+                lo = mid + 1
+            else:
+                hi = mid
+        for idx in range(max(lo - 1, 0), min(lo + 2, num_segs)):
+            if segment_intersects_line(segments, idx, pt_on_line):
+                return pts[idx][0], pts[idx+1][0]
+
+    # go through line segments
+    for idx in range(num_segs):
+        if segment_intersects_line(segments, idx, pt_on_line):
+            return pts[idx][0], pts[idx+1][0] # return x-coords of interval that contains intersection
+
+    return pts[idx][0], pts[idx+1][0] # in case it misses the last interval because intersection occurs at (or near) last endpoint
+
+
+def get_curve_segments(known_xs, known_ys):
+    r"""
+    Precomputes the line segments between consecutive points of a known
+    curve.
+
+    This is an auxiliary function for :func:`get_guess_interval`.
+
+    Parameters
+    ----------
+    known_xs : list of floats
+        A list of x-coordinates.
+
+    known_ys : list of floats
+        A list of y-coordinates associated to ``known_xs`` that lie on the known
+        curve.
+
+    Returns
+    -------
+    dict
+        ``'pts'`` is the list of points, ``'slopes'`` and ``'incpts'`` are the
+        slope and y-intercept of each segment (None for vertical segments),
+        and ``'monotone'`` is True if the angle of the points decreases
+        strictly along the curve.
+    """
+    pts = list(zip(known_xs, known_ys))
+    slopes, incpts = [], []
+    for idx in range(len(pts)-1):
+        if (pts[idx+1][0] == pts[idx][0]):
+            # line segment is vertical
+            slopes.append(None)
+            incpts.append(None)
+        else:
+            seg_slope = (pts[idx+1][1] - pts[idx][1]) / (pts[idx+1][0] - pts[idx][0])
+            slopes.append(seg_slope)
+            incpts.append(pts[idx][1] - pts[idx][0]*seg_slope)
+
+    # the angle decreases when the points are in the first quadrant and each
+    # point is clockwise from the one before it
+    monotone = (len(pts) > 1 and all(x >= 0 and y >= 0 for x, y in pts)
+                and all(x0*y1 - y0*x1 < 0
+                        for (x0, y0), (x1, y1) in zip(pts, pts[1:])))
+    return {'pts': pts, 'slopes': slopes, 'incpts': incpts, 'monotone': monotone}
+
+
+def segment_intersects_line(segments, idx, pt_on_line):
+    r"""
+    Checks whether a segment of a known curve intersects the line that passes
+    through the origin and ``pt_on_line``.
+
+    This is an auxiliary function for :func:`get_guess_interval`.
+
+    Parameters
+    ----------
+    segments : dict
+        The segments of the known curve made by :func:`get_curve_segments`.
+
+    idx : int
+        Index of the segment to check.
+
+    pt_on_line : tuple of floats
+        Point on fitted curve.
+
+    Returns
+    -------
+    bool
+        True if the segment contains the intersection point.
     """
+    pts = segments['pts']
+
     # find slope and y-intercept of line, if finite
     if pt_on_line[0] != 0:
         line_slope, line_incpt = pt_on_line[1] / pt_on_line[0], 0
 
-    pts = list(zip(known_xs, known_ys))
-    # go through line segments
-    for idx in range(len(pts)-1):
-        if (pts[idx+1][0] == pts[idx][0]):
-            # line segment is vertical, so x at intersection (`int_x`)
-            # must be pts[idx][0] (==pts[idx+1][0])
-            int_x = pts[idx][0]
-
-            if pt_on_line[0] == 0: # line is on y-axis
-                if int_x == 0: # segment is on y-axis
-                    int_y = pts[idx][1] # segment is contained in line, just take an endpoint of segment as intersection pt
-                else: # segment doesn't intersect y-axis (and so doesn't intersect line)
-                    continue
-            else: # slope of line is finite
-                # so we can solve for y coordinate of intersection
-                int_y = line_slope*int_x + line_incpt
+    if segments['slopes'][idx] is None:
+        # line segment is vertical, so x at intersection (`int_x`)
+        # must be pts[idx][0] (==pts[idx+1][0])
+        int_x = pts[idx][0]
+
+        if pt_on_line[0] == 0: # line is on y-axis
+            if int_x == 0: # segment is on y-axis
+                int_y = pts[idx][1] # segment is contained in line, just take an endpoint of segment as intersection pt
+            else: # segment doesn't intersect y-axis (and so doesn't intersect line)
+                return False
+        else: # slope of line is finite
+            # so we can solve for y coordinate of intersection
+            int_y = line_slope*int_x + line_incpt
+
+    else: # segment is not vertical, and so has a finite slope
+        seg_slope, seg_incpt = segments['slopes'][idx], segments['incpts'][idx]
+
+        # intersection of line and segment
+        if pt_on_line[0] != 0: # then line_slope and line_incpt are defined
+            int_x = (seg_incpt - line_incpt) / (line_slope - seg_slope)
+            int_y = line_slope*int_x + line_incpt
+
+        else: # intersection is where segment crosses y-axis
+            int_x = 0
+            int_y = seg_incpt
+
+    # check that found intersection point occurs within segment
+    return (min(pts[idx][0], pts[idx+1][0]) <= int_x and int_x <= max(pts[idx][0], pts[idx+1][0])
+            and min(pts[idx][1], pts[idx+1][1]) <= int_y and int_y <= max(pts[idx][1], pts[idx+1][1]))
+
+
+
+######################
+# Calculate distance #
+######################
+
+def find_distance(x, y, xp, yp):
+    r"""
+    Calculates the distance between two points :math:`(x, y)` and
+    :math:`(x_p, y_p)` using a scaled Euclidean distance.
+
+    The scaled Euclidean distance is defined as
+
+    .. math::
+
+       \sqrt{\left(\frac{x_p - x}{x}\right)^2 + \left(\frac{y_p - y}{y}\right)^2}
+
+    If :math:`x` is zero, it is
+
+    .. math::
+
+       \sqrt{\left(\frac{y_p - y}{y}\right)^2}
+
+    If :math:`y` is zero, it is
+
+    .. math::
+
+       \sqrt{\left(\frac{x_p - x}{x}\right)^2}
+
+    It is assumed that :math:`(x, y) \neq 0`.
+
+    Parameters
+    ----------
+    x : float
+        x-coordinate of point on known curve.
+
+    y : float
+        y-coordinate of point on known curve.
+
+    xp : float
+        x-coordinate of point on fitted curve.
+
+    yp : float
+        y-coordinate of point on fitted curve.
+
+    Returns
+    -------
+    mpmath float
+        The calculated distance.
+    """
+    assert not (x == 0 and y == 0) # this should never happen for these curves
+
+    if x == 0: # then xp == 0 too
+        diff_x, diff_y = 0, (yp - y) / y
+    elif y == 0: # then yp == 0 too
+        diff_x, diff_y = (xp - x) / x, 0
+    else: # x != 0 and y != 0
+        diff_x, diff_y = (xp - x) / x, (yp - y) / y
+
+    return mp.sqrt(diff_x**2 + diff_y**2)
+
+
+
+###############
+# Known curve #
+###############
+
+class KnownCurve:
+    r"""
+    A known IV curve and the values derived from it that scoring uses for
+    every fitted curve compared to it.
+
+    A ``KnownCurve`` holds only mpmath floats, lists, and dicts, so it can be
+    pickled and sent to worker processes.
+
+    Parameters
+    ----------
+    curve_parameters : list
+        A list of parameters representing the known IV curve. Should be passed
+        in the order [il, io, rs, rsh, n, ns].
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    num_pts : int
+        Number of points on the known curve.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.) Each solution pair is a point
+        on the curve.
+
+    curve : tuple, optional
+        The ``num_pts`` voltages and currents of the known curve, if they are
+        already available. (See :func:`get_known_curve`) If omitted, they are
+        calculated with :func:`get_curve`.
+
+    Attributes
+    ----------
+    parameters : list
+        ``curve_parameters``.
+
+    vth, num_pts, atol
+        The arguments of the same names.
+
+    xs, ys : sequence of mpmath floats
+        The voltages and currents of the known curve's points.
+
+    segments : dict
+        The segments between the points. (See :func:`get_curve_segments`)
+
+    nnsvth : mpmath float
+        :math:`n N_s V_{th}`
+
+    gsh : mpmath float
+        Shunt conductance :math:`1 / R_{sh}`
+
+    v_oc : mpmath float
+        Open circuit voltage, the voltage of the last point.
+
+    i_sc : mpmath float
+        Short circuit current, the current of the first point.
+    """
+
+    def __init__(self, curve_parameters, vth, num_pts, atol, curve=None):
+        self.parameters = list(curve_parameters)
+        self.vth, self.num_pts, self.atol = vth, num_pts, atol
+        if curve is None:
+            curve = get_curve(self.parameters, vth, num_pts, atol)
+        self.xs, self.ys = curve
+        self.segments = get_curve_segments(self.xs, self.ys)
+
+        il, io, rs, rsh, n, ns = self.parameters
+        self.nnsvth = n * ns * vth
+        self.gsh = 1 / mp.mpf(rsh)
+        self.v_oc, self.i_sc = self.xs[-1], self.ys[0]
+
+    def single_diode(self, v, i):
+        r"""
+        The right hand side of the single diode equation, with two unknowns
+        (the first being voltage, the second being current).
+        """
+        il, io, rs, rsh, n, ns = self.parameters
+        utils.count_stat('mp.expm1 calls')
+        # the expression is kept as is; the score is sensitive to the last
+        # bits of the known current near the intersection with the V axis
+        return il - io * mp.expm1((v + i*rs) / (n * ns * self.vth)) - ((v + i*rs) / rsh)
+
+    def di_dv(self, v, i):
+        r"""
+        The derivatives :math:`\frac{dI}{dV}` and :math:`\frac{d^2I}{dV^2}`
+        of the known curve at the point ``(v, i)`` on it.
+
+        The derivatives are calculated from the Lambert W value of
+        :func:`precise.lambert_i_from_v` at ``v``, which is recovered from
+        ``i`` without an exponential. (See :func:`precise.single_diode_di_dv`)
+        """
+        il, io, rs, rsh, n, ns = self.parameters
+        if rs == 0:
+            return precise.single_diode_di_dv(v, i, il, io, rs, rsh, n, self.vth, ns)
+        # W = Rs I0 exp((V + I Rs)/(n Ns Vth)) / (n Ns Vth (1 + Rs/Rsh))
+        w = rs / self.nnsvth * ((il + io - v*self.gsh) / (rs*self.gsh + 1) - i)
+        diode_g = w * (rs*self.gsh + 1) / rs
+        g = diode_g + self.gsh
+        di_dv = -g / (1 + rs*g)
+        d2i_dv2 = -diode_g * (1 + rs*di_dv) / self.nnsvth / (1 + rs*g)**2
+        return di_dv, d2i_dv2
+
+
+
+###############
+# Final score #
+###############
+
+@utils.timed_stat
+def total_score(known_curve_params, fitted_curve_params, vth, num_pts, atol,
+                intersection_method='secant', warm_start=False, return_num_steps=False,
+                fitted_curve=None):
+    r"""
+    Calculates the total score for a given fitted curve.
+
+    This score encodes how good an approximation the fitted curve is for the
+    curve with the known parameters. If the score is small, then the fitted
+    curve is close to the known curve.
+
+    Parameters
+    ----------
+    known_curve_params : list or KnownCurve
+        A list of parameters representing a given IV curve. The list items
+        should be in the order [il, io, rs, rsh, n, ns]. A :class:`KnownCurve`
+        made with the same ``vth``, ``num_pts``, and ``atol`` may be passed
+        instead, so that the known curve is only calculated once when many
+        fitted curves are scored against it.
+
+        il : numeric
+            Light-generated current :math:`I_L` (photocurrent) [A]
+
+        io : numeric
+            Diode saturation :math:`I_0` current under desired IV curve
+            conditions. [A]
+
+        rs : numeric
+            Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+
+        rsh : numeric
+            Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
+            [ohm]
+
+        n : numeric
+            Diode ideality factor :math:`n`
+
+        ns : numeric
+            Number of cells in series :math:`N_s`
+
+    fitted_curve_params : list
+        A list of parameters representing a given IV curve. Should be passed in
+        the order [il, io, rs, rsh, n, ns].
+
+        il : numeric
+            Light-generated current :math:`I_L` (photocurrent) [A]
+
+        io : numeric
+            Diode saturation :math:`I_0` current under desired IV curve
+            conditions. [A]
+
+        rs : numeric
+            Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+
+        rsh : numeric
+            Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
+            [ohm]
+
+        n : numeric
+            Diode ideality factor :math:`n`
+
+        ns : numeric
+            Number of cells in series :math:`N_s`
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    num_pts : int
+        Number of points we want to compare between the two curves.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``. (See
+        :func:`precise.get_precise_i`.)
+        Each solution pair is a point on the curve.
+
+    intersection_method : str, default 'secant'
+        The method used to find the intersections with the known curve. (See
+        :func:`find_x_intersection`)
+
+    warm_start : bool, default False
+        Start finding each intersection from the previous one. (See
+        :func:`warm_start_x_intersection`) The intersection is found from the
+        interval given by :func:`get_guess_interval` only if this fails.
+        Requires the 'halley' ``intersection_method``.
+
+    return_num_steps : bool, default False
+        Also return the total number of evaluations of the residual of the
+        single diode equation used to find the intersections. (See
+        :func:`find_x_intersection`)
+
+    fitted_curve : tuple, optional
+        The ``num_pts`` voltages and currents of the fitted curve, if they are
+        already available. If omitted, they are calculated with
+        :func:`get_curve`.
+
+    Returns
+    -------
+    score : mpmath float
+        A measure for how close the two inputted curves are to each other.
+        If ``return_num_steps`` is True, a tuple of the score and the number
+        of evaluations is returned.
+
+    Notes
+    -----
+    The user inputs parameters that they’ve fitted to a particular known IV
+    curve. The curve from these fitted parameters is compared to the known IV
+    curve. A sampling of points on the fitted curve are chosen. To get an
+    associated point on the known curve, we draw a line from the origin that
+    passes through the point on the fitted curve. This line will intersect the
+    known curve; this point of intersection is what we compare the fitted point
+    to. We then find the distance between these two points, using the
+    definition of distance given in find_distance. The sum of the distances for
+    each pair of associated points is the score.
+    """
+    if warm_start and intersection_method != 'halley':
+        raise ValueError("warm_start requires the 'halley' intersection_method")
+
+    # get xs and ys for known and fitted curves
+    if isinstance(known_curve_params, KnownCurve):
+        known_curve = known_curve_params
+    else:
+        known_curve = KnownCurve(known_curve_params, vth, num_pts, atol)
+    known_xs, known_ys = known_curve.xs, known_curve.ys
+    if fitted_curve is None:
+        fitted_curve = get_curve(fitted_curve_params, vth, num_pts, atol)
+    fit_xs, fit_ys = fitted_curve
+
+    vth = known_curve.vth
+    single_diode = known_curve.single_diode
+
+    score = 0
+    num_steps = 0
+    prev_pt = None
+
+    for v, i in zip(fit_xs, fit_ys):
+        # for each point (`v`, `i`) on the fitted curve, find the associated
+        # point on known curve (`new_voltage`, `new_current`)
+        new_voltage = None
+        if warm_start and prev_pt is not None:
+            new_voltage, steps = warm_start_x_intersection(known_curve, v, i, prev_pt, atol)
+            num_steps += steps
+        if new_voltage is None:
+            new_voltage, steps = find_x_intersection(single_diode, known_xs, known_ys, v, i,
+                                                     num_pts, atol,
+                                                     segments=known_curve.segments,
+                                                     method=intersection_method,
+                                                     curve_parameters=known_curve.parameters,
+                                                     vth=vth, return_num_steps=True)
+            num_steps += steps
+        # find current associated to new_voltage. It is compared with exactly
+        # zero by find_distance if `i` is zero, so it is found at mp.dps then
+        new_current = get_known_current(known_curve, new_voltage, atol,
+                                        adaptive=(i != 0))
+
+        # calculate distance between these points, and add to score
+        score += find_distance(new_voltage, new_current, v, i)
+        prev_pt = (new_voltage, new_current)
+
+    if return_num_steps:
+        return score, num_steps
+    return score
+
+
+def get_known_current(known_curve, v, atol, adaptive=True):
+    r"""
+    Finds the current of a known curve at the voltage of an intersection
+    found by :func:`total_score`.
+
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The known curve.
+
+    v : numeric
+        The voltage of the intersection.
+
+    atol : float
+        The current is refined with ``mp.findroot`` if the residual of the
+        single diode equation is larger than ``atol``.
+
+    adaptive : bool, default True
+        Find the current with :func:`utils.adaptive_precision`, if adaptive
+        precision is on. If False, it is found at ``mp.dps``, which must be
+        done where the current is compared with exactly zero.
+
+    Returns
+    -------
+    mpmath float
+        The current.
+    """
+    il, io, rs, rsh, n, ns = known_curve.parameters
+    vth = known_curve.vth
+    solve = lambda: precise.lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns)
+    if adaptive:
+        i = utils.adaptive_precision(
+            'get_known_current', solve,
+            lambda c: abs(precise.diff_lhs_rhs(v, c, il, io, rs, rsh, n, vth, ns)) <= atol
+        )
+    else:
+        i = solve()
+
+    # if voltage, current pair not a precise enough solution to single diode equation, make more precise
+    dff = precise.diff_lhs_rhs(v, i, il, io, rs, rsh, n, vth, ns)
+    if abs(dff) > atol:
+        utils.count_stat('mp.findroot calls')
+        utils.count_retry('findroot refinements')
+        i = mp.findroot(lambda y : precise.counted_diff_lhs_rhs(v, y, il, io, rs, rsh, n, vth, ns), i, tol=atol**2)
+    return i
+
+
+
+##############
+# Fast score #
+##############
+
+
+def get_curves_float64(parameter_sets, vth, num_pts):
+    r"""
+    Calculates the points of many IV curves at once in float64.
+
+    The voltages are the ones :func:`get_curve` uses, and the last current
+    of each curve is set to zero like :func:`precise.get_precise_i` does.
+
+    Parameters
+    ----------
+    parameter_sets : numpy array of float64
+        An array of shape ``(num_curves, 6)``. Each row has the parameters of
+        a curve in the order [il, io, rs, rsh, n, ns].
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    num_pts : int
+        Number of points to calculate on each curve.
+
+    Returns
+    -------
+    (vv, ii) : tuple of numpy arrays
+        Arrays of float64 of shape ``(num_curves, num_pts)``.
+    """
+    il, io, rs, rsh, n, ns = np.asarray(parameter_sets, dtype=np.float64).T
+    res = pvlib.pvsystem.singlediode(il, io, rs, rsh, n*ns*float(vth),
+                                     ivcurve_pnts=num_pts)
+    vv, ii = np.atleast_2d(res['v']), np.atleast_2d(res['i'])
+    ii[:, -1] = 0
+    return vv, ii
+
+
+def find_x_intersections_float64(known_parameter_sets, known_vv, known_ii, fit_vv,
+                                 fit_ii, vth, maxsteps=20):
+    r"""
+    Finds the x-coordinates of the intersections between many known IV curves
+    and the lines through the origin and the points of their fitted curves at
+    once in float64.
+
+    This is the float64 version of :func:`find_x_intersection`, using the
+    iterations of :func:`halley_x_intersection` on every line at once. Each
+    iteration is safeguarded by the interval from zero to the known curve's
+    :math:`V_{oc}`, and the iterations start where the line crosses the
+    known curve's segments.
+
+    Parameters
+    ----------
+    known_parameter_sets : numpy array of float64
+        An array of shape ``(num_curves, 6)`` of known curve parameters in the
+        order [il, io, rs, rsh, n, ns].
+
+    known_vv, known_ii : numpy arrays of float64
+        Points on the known curves. (See :func:`get_curves_float64`)
+
+    fit_vv, fit_ii : numpy arrays of float64
+        Points on the fitted curves, one row per known curve.
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+
+    maxsteps : int, default 20
+        Maximum number of iterations.
+
+    Returns
+    -------
+    numpy array of float64
+        The x-coordinates of the intersections, with the shape of ``fit_vv``.
+    """
+    il, io, rs, rsh, n, ns = [p[:, None] for p in
+                              np.asarray(known_parameter_sets, dtype=np.float64).T]
+    nnsvth = n*ns*float(vth)
+    eps = np.finfo(np.float64).eps
+    with np.errstate(all='ignore'):
+        slope = np.where(fit_vv > 0, fit_ii / fit_vv, 0)
+        a = 1 + slope*rs
+
+        # first known point on or below each line, as in get_guess_interval
+        cross = fit_vv[:, :, None]*known_ii[:, None, :] - fit_ii[:, :, None]*known_vv[:, None, :]
+        below = cross <= 0
+        k = np.where(below.any(axis=2), np.argmax(below, axis=2), known_vv.shape[1] - 1)
+        k = np.maximum(k, 1)
+        x1, y1 = np.take_along_axis(known_vv, k - 1, 1), np.take_along_axis(known_ii, k - 1, 1)
+        x2, y2 = np.take_along_axis(known_vv, k, 1), np.take_along_axis(known_ii, k, 1)
+        segment_slope = (y2 - y1) / (x2 - x1)
+        x = (y1 - segment_slope*x1) / (slope - segment_slope)
+
+        # the residual is positive at zero and not positive at V_oc
+        xl = np.zeros_like(fit_vv)
+        xr = np.broadcast_to(known_vv[:, -1:], fit_vv.shape).copy()
+        x = np.where(np.isfinite(x) & (xl < x) & (x < xr), x, x2)
+        for _ in range(maxsteps):
+            u = a*x / nnsvth
+            exp_term = io*np.exp(u)
+            f = il - io*np.expm1(u) - a*x/rsh - slope*x
+            df = -exp_term*a/nnsvth - a/rsh - slope
+            d2f = -exp_term*(a/nnsvth)**2
+            xl, xr = np.where(f > 0, x, xl), np.where(f > 0, xr, x)
+            x_next = x - 2*f*df / (2*df**2 - f*d2f)
+            x_next = np.where(np.isfinite(x_next) & (xl <= x_next) & (x_next <= xr),
+                              x_next, (xl + xr) / 2)
+            converged = np.abs(x_next - x) <= 8*eps*np.abs(x)
+            x = x_next
+            if np.all(converged):
+                break
+    return np.where(fit_vv == 0, 0, x)
+
+
+def known_voc_current_is_zero(known_curve, atol):
+    r"""
+    Checks if the current :func:`total_score` finds on a known curve for the
+    last point of a fitted curve is exactly zero.
+
+    The last point of every fitted curve is :math:`(V_{oc}, 0)`, so the line
+    through it is the voltage axis, and its intersection with the known curve
+    does not depend on the fitted curve. (With the default 'secant'
+    intersection method and no warm start.) :func:`find_distance` adds 1 to
+    the square of the distance there unless the current is exactly zero.
+
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The known curve.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
+
+    Returns
+    -------
+    bool
+    """
+    v = find_x_intersection(known_curve.single_diode, known_curve.xs,
+                            known_curve.ys, known_curve.xs[-1], mp.mpf(0),
+                            known_curve.num_pts, atol,
+                            segments=known_curve.segments)
+    return get_known_current(known_curve, v, atol, adaptive=False) == 0
+
+
+def fast_total_scores(known_parameter_sets, fitted_parameter_sets, vth, num_pts,
+                      voc_current_is_zero=None):
+    r"""
+    Calculates the total scores of many fitted curves at once in float64,
+    with an estimate of each score's error.
+
+    This is a fast approximation of :func:`total_score`, for comparing fits
+    while developing them. The curves are calculated with
+    :func:`get_curves_float64`, the intersections with
+    :func:`find_x_intersections_float64`, and the distances as in
+    :func:`find_distance`.
+
+    Parameters
+    ----------
+    known_parameter_sets : numpy array of float64
+        An array of shape ``(num_curves, 6)`` of known curve parameters in the
+        order [il, io, rs, rsh, n, ns].
+
+    fitted_parameter_sets : numpy array of float64
+        An array of shape ``(num_curves, 6)`` of the fitted curve parameters
+        of each known curve.
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+
+    num_pts : int
+        Number of points we want to compare between the two curves.
+
+    voc_current_is_zero : numpy array of bool, optional
+        Whether the current of each known curve at the intersection with the
+        line through the fitted curve's last point is exactly zero. (See
+        :func:`known_voc_current_is_zero`) If omitted, it is assumed to be
+        nonzero, and the error estimate includes the difference.
+
+    Returns
+    -------
+    (scores, errors) : tuple of numpy arrays
+        Arrays of float64 of length ``num_curves``. ``errors`` estimates the
+        absolute difference between each score and the score of
+        :func:`total_score`.
+
+    Notes
+    -----
+    The error estimate propagates the float64 rounding errors of the
+    intersections, the known currents, and the fitted currents (estimated
+    from the residuals of the single diode equation) through the distances.
+
+    The line through each fitted curve's :math:`V_{oc}` meets the known curve
+    at its :math:`V_{oc}`. :func:`find_distance` adds 1 to the square of the
+    distance there if the mpmath known current is not exactly zero, which
+    float64 cannot tell, so it is taken from ``voc_current_is_zero``. Without
+    it, the 1 is added, and the error estimate includes the amount it adds
+    to the score, which is at most 1.
+    """
+    vth = float(vth)
+    eps = np.finfo(np.float64).eps
+    known_parameter_sets = np.asarray(known_parameter_sets, dtype=np.float64)
+    fitted_parameter_sets = np.asarray(fitted_parameter_sets, dtype=np.float64)
+    known_vv, known_ii = get_curves_float64(known_parameter_sets, vth, num_pts)
+    fit_vv, fit_ii = get_curves_float64(fitted_parameter_sets, vth, num_pts)
+    x = find_x_intersections_float64(known_parameter_sets, known_vv, known_ii,
+                                     fit_vv, fit_ii, vth)
+
+    il, io, rs, rsh, n, ns = [p[:, None] for p in known_parameter_sets.T]
+    fil, fio, frs, frsh, fn, fns = [p[:, None] for p in fitted_parameter_sets.T]
+    with np.errstate(all='ignore'):
+        y = pvlib.pvsystem.i_from_v(rsh, rs, n*ns*vth, x, io, il)
+        x_nonzero, y_nonzero = np.where(x == 0, 1, x), np.where(y == 0, 1, y)
+        diff_x = np.where(x == 0, 0, (fit_vv - x) / x_nonzero)
+        diff_y = np.where(fit_ii == 0, -1, (fit_ii - y) / y_nonzero)
+        if voc_current_is_zero is not None:
+            diff_y[:, -1] = np.where(voc_current_is_zero, 0, -1)
+        distances = np.sqrt(diff_x**2 + diff_y**2)
+
+        # errors of the intersections and known currents
+        known_exp = io*np.exp((x + y*rs) / (n*ns*vth))
+        known_g = known_exp / (n*ns*vth) + 1/rsh
+        x_error = 4*eps*np.abs(x)
+        y_error = 8*eps*(il + known_exp) + known_g / (1 + rs*known_g) * x_error
+        # errors of the fitted currents, from the single diode residuals
+        fit_u = (fit_vv + fit_ii*frs) / (fn*fns*vth)
+        fit_exp = fio*np.exp(fit_u)
+        fit_residual = (fil - fio*np.expm1(fit_u) - (fit_vv + fit_ii*frs)/frsh - fit_ii)
+        fit_g = fit_exp / (fn*fns*vth) + 1/frsh
+        fit_i_error = (np.abs(fit_residual) + 8*eps*(fil + fit_exp)) / (1 + frs*fit_g)
+        fit_i_error[:, -1] = 0
+        fit_v_error = np.zeros_like(fit_vv)
+        fit_v_error[:, -1] = 4*eps*fit_vv[:, -1]
+
+        diff_x_error = np.where(x == 0, 0, (np.abs(fit_vv)*x_error / x_nonzero**2
+                                            + fit_v_error / np.abs(x_nonzero)))
+        diff_y_error = np.where(fit_ii == 0, 0, (np.abs(fit_ii)*y_error / y_nonzero**2
+                                                 + fit_i_error / np.abs(y_nonzero)))
+        distance_errors = np.where(
+            distances > 0,
+            (np.abs(diff_x)*diff_x_error + np.abs(diff_y)*diff_y_error)
+            / np.where(distances > 0, distances, 1),
+            diff_x_error + diff_y_error
+        )
+        scores = distances.sum(axis=1)
+        errors = distance_errors.sum(axis=1) + num_pts*eps*scores
+        if voc_current_is_zero is None:
+            # the score of total_score may not have the 1 at V_oc
+            errors += distances[:, -1] - np.abs(diff_x[:, -1])
+    return scores, errors
+
+
+def fast_score_submissions(fitted_files_directories, vth, num_pts, atol, test_set=''):
+    r"""
+    Scores the fitted parameters of many submissions with
+    :func:`fast_total_scores`.
+
+    The known curves of each test set are made once, to find where their
+    current at :math:`V_{oc}` is exactly zero in mpmath. (See
+    :func:`known_voc_current_is_zero`)
+
+    Parameters
+    ----------
+    fitted_files_directories : list of str
+        Directories that contain fitted parameter CSV files, one per
+        submission. (See :func:`get_test_sets_to_score`)
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+
+    num_pts : int
+        Number of points compared on each IV curve.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
+
+    test_set : str, default ''
+        A singular test set filename to score. (See
+        :func:`get_test_sets_to_score`)
+
+    Returns
+    -------
+    (submission_scores, submission_errors) : tuple of dict
+        ``submission_scores`` maps each directory in
+        ``fitted_files_directories`` to its scores, or to the exception raised
+        while scoring it. The scores are a dictionary of test set filenames
+        (excluding file extensions) to a dictionary of test case indices to
+        test case scores. ``submission_errors`` has the same layout, with the
+        estimated error of each score in place of the score.
+    """
+    submission_scores, submission_errors = {}, {}
+    voc_current_is_zero = {}
+    for directory in fitted_files_directories:
+        try:
+            scores, errors = {}, {}
+            for name in get_test_sets_to_score(directory, test_set):
+                if name not in voc_current_is_zero:
+                    known_curves = get_known_curves(name, vth, num_pts, atol)
+                    voc_current_is_zero[name] = {
+                        idx: known_voc_current_is_zero(known_curve, atol)
+                        for idx, known_curve in known_curves.items()
+                    }
+                known_parameter_sets = utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
+                fitted_parameter_sets = utils.read_iv_curve_parameter_sets(f'{directory}/{name}')
+                indices = list(known_parameter_sets.keys())
+                for idx in indices:
+                    reason = validate_fitted_parameters(fitted_parameter_sets[idx])
+                    if reason is not None:
+                        raise ValueError(f'invalid fitted parameters for {name} {idx}: {reason}')
+                test_set_scores, test_set_errors = fast_total_scores(
+                    [[float(p) for p in known_parameter_sets[idx]] for idx in indices],
+                    [[float(p) for p in fitted_parameter_sets[idx]] for idx in indices],
+                    vth, num_pts,
+                    np.array([voc_current_is_zero[name][idx] for idx in indices])
+                )
+                scores[name] = dict(zip(indices, map(mp.mpf, test_set_scores)))
+                errors[name] = dict(zip(indices, map(mp.mpf, test_set_errors)))
+        except Exception as e:
+            scores, errors = e, {}
+        submission_scores[directory] = scores
+        submission_errors[directory] = errors
+    return submission_scores, submission_errors
+
+
+
+##############################
+# Validate fitted parameters #
+##############################
+
+
+def validate_fitted_parameters(fitted_curve_params):
+    r"""
+    Checks that fitted parameters are finite, have physical signs, and have
+    an integer number of cells in series. Fitted parameters that fail these
+    checks cannot be scored.
+
+    Parameters
+    ----------
+    fitted_curve_params : list
+        A list of parameters representing the fitted IV curve. The list items
+        should be in the order [il, io, rs, rsh, n, ns].
+
+    Returns
+    -------
+    str or None
+        The reason the parameters are invalid, or None if they are valid.
+    """
+    names = utils.IV_PARAMETER_NAMES
+    for name, value in zip(names, fitted_curve_params):
+        if not mp.isfinite(value):
+            return f'{name} is not finite ({value})'
+
+    il, io, rs, rsh, n, ns = fitted_curve_params
+    for name, value in [(names[0], il), (names[1], io), (names[3], rsh), (names[4], n)]:
+        if value <= 0:
+            return f'{name} is not positive ({value})'
+    if rs < 0:
+        return f'{names[2]} is negative ({rs})'
+    if ns < 1 or not mp.isint(ns):
+        return f'{names[5]} is not a positive integer ({ns})'
+    return None
+
+
+def check_fitted_curve(known_curve, fitted_curve_params):
+    r"""
+    Checks that valid fitted parameters (see :func:`validate_fitted_parameters`)
+    are in physical ranges, and that the fitted curve is close to the known
+    curve. Fitted parameters that fail these checks can be scored, but are
+    likely a mistake.
+
+    The fitted curve's :math:`V_{oc}` and :math:`I_{sc}` are calculated in
+    float64 with :external+pvlib:func:`pvlib.pvsystem.v_from_i` and
+    :external+pvlib:func:`pvlib.pvsystem.i_from_v`, and must be within a
+    factor of ``FITTED_CURVE_MAX_RATIO`` of the known curve's.
+
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The known curve the fitted curve is compared to.
+
+    fitted_curve_params : list
+        A list of parameters representing the fitted IV curve. The list items
+        should be in the order [il, io, rs, rsh, n, ns].
+
+    Returns
+    -------
+    str or None
+        The reason the parameters are flagged, or None if they pass.
+    """
+    names = utils.IV_PARAMETER_NAMES
+    il, io, rs, rsh, n, ns = [float(x) for x in fitted_curve_params]
+    if io >= il:
+        return f'{names[1]} is not less than {names[0]} ({io} >= {il})'
+    if not (IDEALITY_FACTOR_RANGE[0] <= n <= IDEALITY_FACTOR_RANGE[1]):
+        return f'{names[4]} is outside {IDEALITY_FACTOR_RANGE} ({n})'
+
+    nnsvth = n*ns*float(known_curve.vth)
+    with np.errstate(all='ignore'):
+        v_oc = float(pvlib.pvsystem.v_from_i(rsh, rs, nnsvth, 0., io, il))
+        i_sc = float(pvlib.pvsystem.i_from_v(rsh, rs, nnsvth, 0., io, il))
+    for label, fitted, known in [('V_oc', v_oc, float(known_curve.v_oc)),
+                                 ('I_sc', i_sc, float(known_curve.i_sc))]:
+        if not (known / FITTED_CURVE_MAX_RATIO <= fitted <= known * FITTED_CURVE_MAX_RATIO):
+            return (f'the fitted curve is far from the known curve '
+                    f'({label} {fitted:.6g} vs. {known:.6g})')
+    return None
+
+
+def summarize_fitted_curve_flags(flags):
+    r"""
+    Summarizes the flags of a submission's test cases in one message, with
+    the number of test cases flagged for each reason.
+
+    Parameters
+    ----------
+    flags : list of tuple
+        The ``(name, idx, flag)`` of each flagged test case, where ``name`` is
+        a test set filename (excluding file extensions), ``idx`` is a test
+        case index, and ``flag`` is returned by :func:`check_fitted_curve`.
+
+    Returns
+    -------
+    str
+        One ``'{reason} in {count} test case(s) (first: {name} {idx}, ...)'``
+        part per reason, joined by ``'; '``. The values of the first test case
+        flagged for each reason are included.
+    """
+    reasons = {}
+    for name, idx, flag in flags:
+        # the values of a flag are in parentheses at its end
+        reason, _, values = flag.rpartition(' (')
+        reasons.setdefault(reason, []).append(f'{name} {idx}, {values[:-1]}')
+    return '; '.join(f'{reason} in {len(cases)} test case(s) (first: {cases[0]})'
+                     for reason, cases in reasons.items())
 
-        else: # segment is not vertical, and so has a finite slope
-            # find slope and y-intercept of segment
-            seg_slope = (pts[idx+1][1] - pts[idx][1]) / (pts[idx+1][0] - pts[idx][0])
-            seg_incpt = pts[idx][1] - pts[idx][0]*seg_slope
 
-            # intersection of line and segment
-            if pt_on_line[0] != 0: # then line_slope and line_incpt are defined
-                int_x = (seg_incpt - line_incpt) / (line_slope - seg_slope)
-                int_y = line_slope*int_x + line_incpt
 
-            else: # intersection is where segment crosses y-axis
-                int_x = 0
-                int_y = seg_incpt
+#####################
+# Score submissions #
+#####################
 
-        # check that found intersection point occurs within segment
-        # if intersection point is within segment, return intersection point
-        if min(pts[idx][0], pts[idx+1][0]) <= int_x and int_x <= max(pts[idx][0], pts[idx+1][0]):
-            if min(pts[idx][1], pts[idx+1][1]) <= int_y and int_y <= max(pts[idx][1], pts[idx+1][1]):
-                return pts[idx][0], pts[idx+1][0] # return x-coords of interval that contains intersection
 
-    return pts[idx][0], pts[idx+1][0] # in case it misses the last interval because intersection occurs at (or near) last endpoint
+def get_known_curves(test_set_name, vth, num_pts, atol, known_curves_from_json=True):
+    r"""
+    Makes the known curve of every test case in a test set.
 
+    Parameters
+    ----------
+    test_set_name : str
+        Filename of the test set in ``utils.TEST_SETS_DIR`` (excluding file
+        extensions).
 
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
 
-######################
-# Calculate distance #
-######################
+    num_pts : int
+        Number of points on each known curve.
 
-def find_distance(x, y, xp, yp):
-    r"""
-    Calculates the distance between two points :math:`(x, y)` and
-    :math:`(x_p, y_p)` using a scaled Euclidean distance.
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
 
-    The scaled Euclidean distance is defined as
+    known_curves_from_json : bool, default True
+        Use the curves in the test set's JSON file when they are compatible.
+        (See :func:`get_known_curve`) They are read from the JSON file's
+        compact companion if it is up to date, which only parses the points
+        that are used. (See :func:`compact.read_compact_test_set`)
 
-    .. math::
+    Returns
+    -------
+    dict
+        A mapping of test case indices to :class:`KnownCurve` objects.
+    """
+    known_parameter_sets = utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{test_set_name}')
+    known_iv_curves_json = {}
+    if known_curves_from_json:
+        known_iv_curves_json = compact.read_compact_test_set(f'{utils.TEST_SETS_DIR}/{test_set_name}')
+        if known_iv_curves_json is None:
+            known_iv_curves_json = utils.read_iv_curve_json(f'{utils.TEST_SETS_DIR}/{test_set_name}')
+    with utils.stats_case(f'{test_set_name} known curves'):
+        return {
+            idx: KnownCurve(known_p, vth, num_pts, atol,
+                            get_known_curve(known_iv_curves_json.get(idx), known_p,
+                                            vth, num_pts, atol))
+            for idx, known_p in known_parameter_sets.items()
+        }
+
+
+def score_case(known_curve, fitted_curve_params, intersection_method='secant',
+               warm_start=False, fitted_curve=None):
+    r"""
+    Scores a test case with :func:`total_score`, using the ``vth``,
+    ``num_pts``, and ``atol`` of ``known_curve``.
 
-       \sqrt{\left(\frac{x_p - x}{x}\right)^2 + \left(\frac{y_p - y}{y}\right)^2}
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The test case's known curve.
 
-    If :math:`x` is zero, it is
+    fitted_curve_params : list
+        A list of parameters representing the fitted IV curve. The list items
+        should be in the order [il, io, rs, rsh, n, ns].
 
-    .. math::
+    intersection_method : str, default 'secant'
+        The method used to find the intersections with the known curve. (See
+        :func:`find_x_intersection`)
 
-       \sqrt{\left(\frac{y_p - y}{y}\right)^2}
+    warm_start : bool, default False
+        Start finding each intersection from the previous one. (See
+        :func:`total_score`)
 
-    If :math:`y` is zero, it is
+    fitted_curve : tuple, optional
+        The points of the fitted curve, if they are already available. (See
+        :func:`total_score`)
 
-    .. math::
+    Returns
+    -------
+    (score, num_steps) : tuple
+        The test case's score and the number of evaluations of the residual
+        of the single diode equation used to find the intersections.
+    """
+    return total_score(known_curve, fitted_curve_params, known_curve.vth,
+                       known_curve.num_pts, known_curve.atol, intersection_method,
+                       warm_start, return_num_steps=True, fitted_curve=fitted_curve)
 
-       \sqrt{\left(\frac{x_p - x}{x}\right)^2}
 
-    It is assumed that :math:`(x, y) \neq 0`.
+class FittedCurveMemo:
+    r"""
+    A memo of the points of fitted curves, so that the fitted curve of
+    parameters repeated across test cases and submissions is calculated once.
 
     Parameters
     ----------
-    x : float
-        x-coordinate of point on known curve.
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
 
-    y : float
-        y-coordinate of point on known curve.
+    num_pts : int
+        Number of points on each fitted curve.
 
-    xp : float
-        x-coordinate of point on fitted curve.
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
 
-    yp : float
-        y-coordinate of point on fitted curve.
+    Attributes
+    ----------
+    curves : dict
+        A mapping of fitted parameter tuples to the points of their curves.
+        (See :func:`get_curve`)
 
-    Returns
-    -------
-    mpmath float
-        The calculated distance.
-    """
-    assert not (x == 0 and y == 0) # this should never happen for these curves
+    errors : dict
+        A mapping of fitted parameter tuples to the exceptions raised while
+        calculating their curves by :meth:`add`.
 
-    if x == 0: # then xp == 0 too
-        diff_x, diff_y = 0, (yp - y) / y
-    elif y == 0: # then yp == 0 too
-        diff_x, diff_y = (xp - x) / x, 0
-    else: # x != 0 and y != 0
-        diff_x, diff_y = (xp - x) / x, (yp - y) / y
+    num_lookups : int
+        Number of fitted parameter rows looked up by :meth:`get` and
+        :meth:`add`.
 
-    return mp.sqrt(diff_x**2 + diff_y**2)
+    num_hits : int
+        Number of lookups whose curve was already calculated.
+    """
 
+    def __init__(self, vth, num_pts, atol):
+        self.vth, self.num_pts, self.atol = vth, num_pts, atol
+        self.curves, self.errors = {}, {}
+        self.num_lookups, self.num_hits = 0, 0
+
+    def get(self, fitted_curve_params):
+        r"""
+        Returns the points of the fitted curve of ``fitted_curve_params``,
+        calculating them with :func:`get_curve` if they are not in the memo.
+        Raises the exception recorded in ``errors`` if :meth:`add` could not
+        calculate them.
+        """
+        key = tuple(fitted_curve_params)
+        self.num_lookups += 1
+        if key in self.errors:
+            raise self.errors[key]
+        if key in self.curves:
+            self.num_hits += 1
+        else:
+            self.curves[key] = utils.call_in_case(get_fitted_curve_case(key),
+                                                  get_curve, fitted_curve_params,
+                                                  self.vth, self.num_pts, self.atol)
+        return self.curves[key]
+
+    def add(self, fitted_parameter_sets, executor):
+        r"""
+        Calculates the fitted curves of the parameters in
+        ``fitted_parameter_sets`` that are not in the memo, in parallel with
+        ``executor``. Each parameter row counts as a lookup. The exception
+        raised by a fitted curve is recorded in ``errors`` instead of being
+        raised, so that it only fails the test cases that use the curve.
+        """
+        keys = [key for key in dict.fromkeys(map(tuple, fitted_parameter_sets))
+                if key not in self.curves and key not in self.errors]
+        self.num_lookups += len(fitted_parameter_sets)
+        self.num_hits += len(fitted_parameter_sets) - len(keys)
+        curves = executor.map(utils.call_collecting_worker_counters,
+                              itertools.repeat(utils.call_returning_exception),
+                              itertools.repeat(utils.call_in_case),
+                              map(get_fitted_curve_case, keys),
+                              itertools.repeat(get_curve), keys,
+                              itertools.repeat(self.vth), itertools.repeat(self.num_pts),
+                              itertools.repeat(self.atol))
+        for key, curve in zip(keys, utils.merge_worker_counters(curves)):
+            if isinstance(curve, Exception):
+                self.errors[key] = curve
+            else:
+                self.curves[key] = curve
 
+    def format_hit_rate(self):
+        r"""
+        Formats the number of lookups, distinct fitted curves, and the hit
+        rate of the memo as a line of text.
+        """
+        hit_rate = self.num_hits / self.num_lookups if self.num_lookups else 0
+        return (f'fitted curves: {self.num_lookups} lookups, '
+                f'{len(self.curves)} calculated, {hit_rate:.1%} hit rate')
 
-###############
-# Final score #
-###############
 
-def total_score(known_curve_params, fitted_curve_params, vth, num_pts, atol):
+def get_fitted_curve_case(fitted_curve_params):
     r"""
-    Calculates the total score for a given fitted curve.
-
-    This score encodes how good an approximation the fitted curve is for the
-    curve with the known parameters. If the score is small, then the fitted
-    curve is close to the known curve.
+    Identifies the calculation of a fitted curve by :class:`FittedCurveMemo`
+    in the collected stats and the event log. (See :func:`utils.call_in_case`)
 
     Parameters
     ----------
-    known_curve_params : list
-        A list of parameters representing a given IV curve. The list items
+    fitted_curve_params : list
+        A list of parameters representing the fitted IV curve. The list items
         should be in the order [il, io, rs, rsh, n, ns].
 
-        il : numeric
-            Light-generated current :math:`I_L` (photocurrent) [A]
+    Returns
+    -------
+    dict
+        The ``FITTED_CURVES_STATS_CASE`` ``'label'`` in the stats, and the
+        ``'kind'`` ``'fitted_curve'`` and ``'parameters'`` of its events in the
+        event log.
+    """
+    return {'label': FITTED_CURVES_STATS_CASE, 'kind': 'fitted_curve',
+            'parameters': [str(x) for x in fitted_curve_params]}
 
-        io : numeric
-            Diode saturation :math:`I_0` current under desired IV curve
-            conditions. [A]
 
-        rs : numeric
-            Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+def get_case(directory, test_set_name, idx):
+    r"""
+    Identifies a submission's test case in the collected stats and the event
+    log. (See :func:`utils.call_in_case`)
 
-        rsh : numeric
-            Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
-            [ohm]
+    Parameters
+    ----------
+    directory : str
+        The submission's directory.
 
-        n : numeric
-            Diode ideality factor :math:`n`
+    test_set_name : str
+        Test set filename (excluding file extensions).
 
-        ns : numeric
-            Number of cells in series :math:`N_s`
+    idx : int
+        The Index of the test case.
+
+    Returns
+    -------
+    dict
+        The test case's ``'label'`` in the stats, and its ``'submission'``,
+        ``'test_set'``, and ``'index'`` in the event log.
+    """
+    return {'label': f'{directory} {utils.make_iv_curve_name(test_set_name, idx)}',
+            'submission': directory, 'test_set': test_set_name, 'index': idx}
+
+
+def get_score_key(known_curve, fitted_curve_params, intersection_method='secant',
+                  warm_start=False, known_curves_from_json=True):
+    r"""
+    Makes the score cache key of a test case scored by :func:`score_case`.
+    (See :func:`cache.score_key`)
+
+    The key is made from the known and fitted parameters, the ``vth``,
+    ``num_pts``, and ``atol`` of ``known_curve``, ``SCORER_VERSION``, and the
+    scorer options. It changes whenever any of them do, so a cached score is
+    never used for a test case it was not calculated for.
+
+    Parameters
+    ----------
+    known_curve : KnownCurve
+        The test case's known curve.
 
     fitted_curve_params : list
-        A list of parameters representing a given IV curve. Should be passed in
-        the order [il, io, rs, rsh, n, ns].
+        A list of parameters representing the fitted IV curve. The list items
+        should be in the order [il, io, rs, rsh, n, ns].
 
-        il : numeric
-            Light-generated current :math:`I_L` (photocurrent) [A]
+    intersection_method : str, default 'secant'
+        See :func:`score_case`.
 
-        io : numeric
-            Diode saturation :math:`I_0` current under desired IV curve
-            conditions. [A]
+    warm_start : bool, default False
+        See :func:`score_case`.
 
-        rs : numeric
-            Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+    known_curves_from_json : bool, default True
+        Whether the known curve's points are from its test set's JSON file.
+        (See :func:`get_known_curves`)
 
-        rsh : numeric
-            Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
-            [ohm]
+    Returns
+    -------
+    str
+        The cache key.
+    """
+    scorer_version = [SCORER_VERSION, intersection_method, bool(warm_start),
+                      bool(known_curves_from_json)]
+    return cache.score_key(known_curve.parameters, fitted_curve_params,
+                           known_curve.vth, known_curve.num_pts, known_curve.atol,
+                           scorer_version)
 
-        n : numeric
-            Diode ideality factor :math:`n`
 
-        ns : numeric
-            Number of cells in series :math:`N_s`
+def iter_case_scores(fitted_files_directories, vth, num_pts, atol, test_set='',
+                     known_curves_from_json=True, executor=None,
+                     intersection_method='secant', warm_start=False,
+                     strict_validation=False, fitted_curves=None):
+    r"""
+    Scores the fitted parameters of many submissions, yielding the score of
+    each test case as soon as it and the test cases before it are scored.
+
+    The known curves of a test set are made once and shared by every
+    submission that has fitted parameters for it. The fitted parameters of
+    every test case of a submission are checked before any known curve is
+    made for it. If any are invalid (see :func:`validate_fitted_parameters`),
+    the submission is not scored. Then, the fitted parameters are compared to
+    the known curves. If any are flagged (see :func:`check_fitted_curve`), one
+    warning summarizing the flags is issued for the submission (see
+    :func:`summarize_fitted_curve_flags`), or the submission is not scored if
+    ``strict_validation`` is True.
+
+    If the score cache is on (see :func:`utils.set_score_cache`), the scores
+    of test cases are loaded from it when it has them, and saved to it
+    otherwise. Their fitted curves are not calculated either. The key of a
+    score is made by :func:`get_score_key`.
+
+    If the stats collector is on (see :func:`utils.set_stats`), the stats of
+    each test case are labeled by :func:`get_case`, and the stats of the
+    fitted curves by ``FITTED_CURVES_STATS_CASE``. If the event log is on (see
+    :func:`utils.set_event_log`), each test case scored is logged where it is
+    scored, each fitted curve calculated is logged with ``'fitted_curve_*'``
+    events where it is calculated (see :func:`get_fitted_curve_case`), each
+    test case whose score is cached is logged with a ``'case_cached'`` event,
+    and each test set of a submission is logged. (See
+    :func:`utils.logged_test_set`)
+
+    Parameters
+    ----------
+    fitted_files_directories : list of str
+        Directories that contain fitted parameter CSV files, one per
+        submission. (See :func:`get_test_sets_to_score`)
 
     vth : numeric
         Thermal voltage of the cell :math:`V_{th}` [V]
-        The thermal voltage of the cell (in volts) may be calculated as
-        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
-        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
-        :math:`q` is the charge of an electron (coulombs).
 
     num_pts : int
-        Number of points we want to compare between the two curves.
+        Number of points compared on each IV curve.
 
     atol : float
-        The error of each of the solution pairs found is at most ``atol``. (See
-        :func:`precise.get_precise_i`.)
-        Each solution pair is a point on the curve.
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.)
+
+    test_set : str, default ''
+        A singular test set filename to score. (See
+        :func:`get_test_sets_to_score`)
+
+    known_curves_from_json : bool, default True
+        Use the curves in the test sets' JSON files when they are compatible.
+        (See :func:`get_known_curve`)
+
+    executor : concurrent.futures.Executor, optional
+        If given, the test cases of every submission are submitted to
+        ``executor`` before any is waited on, and are scored in parallel.
+        Otherwise, the test cases are scored one at a time as the returned
+        iterator is consumed.
+
+    intersection_method : str, default 'secant'
+        The method used to find the intersections with the known curves. (See
+        :func:`find_x_intersection`)
+
+    warm_start : bool, default False
+        Start finding each intersection from the previous one. (See
+        :func:`total_score`)
+
+    strict_validation : bool, default False
+        Do not score submissions with flagged fitted parameters either.
+
+    fitted_curves : FittedCurveMemo, optional
+        A memo of the fitted curves, which must have the same ``vth``,
+        ``num_pts``, and ``atol``. The fitted curve of each distinct fitted
+        parameter row is calculated once and added to it. If omitted, a new
+        memo is used.
+
+    Yields
+    ------
+    (directory, name, idx, result) : tuple
+        A submission's directory, a test set filename (excluding file
+        extensions), a test case index, and the test case's
+        ``(score, num_steps)``. (See :func:`score_case`) The test cases are
+        yielded in the same order for any ``executor``: by submission in the
+        order of ``fitted_files_directories``, then by test set filename, then
+        by test case index. If a test case cannot be scored, ``result`` is the
+        exception raised, and the rest of the submission's test cases are
+        skipped. If a submission's files cannot be read, ``name`` and ``idx``
+        are None and ``result`` is the exception raised.
+    """
+    known_parameter_sets = {}
+    known_curves = {}
+    submission_cases = {}
+    for directory in fitted_files_directories:
+        # a submission with broken files must not stop the others from
+        # being scored
+        try:
+            # check every fitted parameter row before making any known curve,
+            # so that a broken submission is rejected without mpmath work
+            fitted_parameter_sets = {}
+            for name in get_test_sets_to_score(directory, test_set):
+                if name not in known_parameter_sets:
+                    known_parameter_sets[name] = utils.read_iv_curve_parameter_sets(
+                        f'{utils.TEST_SETS_DIR}/{name}'
+                    )
+                fitted_parameter_sets[name] = utils.read_iv_curve_parameter_sets(f'{directory}/{name}')
+                for idx in known_parameter_sets[name]:
+                    reason = validate_fitted_parameters(fitted_parameter_sets[name][idx])
+                    if reason is not None:
+                        raise ValueError(f'invalid fitted parameters for {name} {idx}: {reason}')
+
+            cases, flags = {}, []
+            for name in fitted_parameter_sets:
+                if name not in known_curves:
+                    known_curves[name] = get_known_curves(name, vth, num_pts, atol,
+                                                          known_curves_from_json)
+                for idx, known_curve in known_curves[name].items():
+                    fitted_p = fitted_parameter_sets[name][idx]
+                    flag = check_fitted_curve(known_curve, fitted_p)
+                    if flag is not None:
+                        flags.append((name, idx, flag))
+                    cases[(name, idx)] = (known_curve, fitted_p, intersection_method,
+                                          warm_start)
+            if flags and strict_validation:
+                raise ValueError('flagged fitted parameters: '
+                                 f'{summarize_fitted_curve_flags(flags)}')
+            elif flags:
+                warnings.warn(f'\'{directory}\': {summarize_fitted_curve_flags(flags)}')
+        except Exception as e:
+            cases = e
+        submission_cases[directory] = cases
+
+    score_keys, cached_scores = {}, {}
+    if utils.get_score_cache() is not None:
+        for directory, cases in submission_cases.items():
+            if isinstance(cases, Exception):
+                continue
+            for (name, idx), case in cases.items():
+                key = get_score_key(case[0], case[1], intersection_method,
+                                    warm_start, known_curves_from_json)
+                score_keys[(directory, name, idx)] = key
+                cached_score = cache.load_score(key)
+                if cached_score is not None:
+                    cached_scores[(directory, name, idx)] = cached_score
+
+    if fitted_curves is None:
+        fitted_curves = FittedCurveMemo(vth, num_pts, atol)
+    futures = {}
+    if executor is not None:
+        uncached_cases = {
+            directory: {(name, idx): case for (name, idx), case in cases.items()
+                        if (directory, name, idx) not in cached_scores}
+            for directory, cases in submission_cases.items()
+            if not isinstance(cases, Exception)
+        }
+        # calculate the distinct fitted curves before the test cases that
+        # share them are submitted
+        fitted_curves.add([case[1] for cases in uncached_cases.values()
+                           for case in cases.values()], executor)
+        for directory, cases in uncached_cases.items():
+            futures[directory] = {
+                (name, idx): executor.submit(utils.call_collecting_worker_counters,
+                                             utils.call_in_case,
+                                             get_case(directory, name, idx),
+                                             score_case, *case,
+                                             fitted_curves.curves[tuple(case[1])])
+                for (name, idx), case in cases.items()
+                if tuple(case[1]) in fitted_curves.curves
+            }
+
+    with contextlib.ExitStack() as test_set_log:
+        try:
+            for directory, cases in submission_cases.items():
+                if isinstance(cases, Exception):
+                    yield directory, None, None, cases
+                    continue
+                logged_test_set = None
+                for (name, idx), case in cases.items():
+                    if name != logged_test_set:
+                        # the test cases of a test set are consecutive
+                        test_set_log.close()
+                        test_set_log.enter_context(
+                            utils.logged_test_set(submission=directory, test_set=name)
+                        )
+                        logged_test_set = name
+                    try:
+                        if (directory, name, idx) in cached_scores:
+                            result = cached_scores[(directory, name, idx)]
+                            utils.log_event('case_cached', submission=directory,
+                                            test_set=name, index=idx)
+                        else:
+                            if executor is None:
+                                fitted_curve = fitted_curves.get(case[1])
+                                result = utils.call_in_case(get_case(directory, name, idx),
+                                                            score_case, *case, fitted_curve)
+                            elif (name, idx) not in futures[directory]:
+                                # the fitted curve could not be calculated
+                                raise fitted_curves.errors[tuple(case[1])]
+                            else:
+                                result, counters = futures[directory][(name, idx)].result()
+                                utils.add_worker_counters(counters)
+                            if (directory, name, idx) in score_keys:
+                                cache.save_score(score_keys[(directory, name, idx)], *result)
+                    except Exception as e:
+                        for future in futures.get(directory, {}).values():
+                            future.cancel()
+                        yield directory, name, idx, e
+                        break
+                    yield directory, name, idx, result
+                test_set_log.close()
+        finally:
+            # do not wait on test cases nobody will read, such as after an
+            # interrupt
+            for submission_futures in futures.values():
+                for future in submission_futures.values():
+                    future.cancel()
+
+
+def score_submissions(fitted_files_directories, vth, num_pts, atol, test_set='',
+                      known_curves_from_json=True, executor=None,
+                      intersection_method='secant', warm_start=False,
+                      strict_validation=False, fitted_curves=None):
+    r"""
+    Scores the fitted parameters of many submissions.
+
+    The parameters are the same as the ones of :func:`iter_case_scores`.
 
     Returns
     -------
-    score : mpmath float
-        A measure for how close the two inputted curves are to each other.
-
-    Notes
-    -----
-    The user inputs parameters that they’ve fitted to a particular known IV
-    curve. The curve from these fitted parameters is compared to the known IV
-    curve. A sampling of points on the fitted curve are chosen. To get an
-    associated point on the known curve, we draw a line from the origin that
-    passes through the point on the fitted curve. This line will intersect the
-    known curve; this point of intersection is what we compare the fitted point
-    to. We then find the distance between these two points, using the
-    definition of distance given in find_distance. The sum of the distances for
-    each pair of associated points is the score.
+    (submission_scores, submission_num_steps) : tuple of dict
+        ``submission_scores`` maps each directory in
+        ``fitted_files_directories`` to its scores, or to the exception raised
+        while scoring it. The scores are a dictionary of test set filenames
+        (excluding file extensions) to a dictionary of test case indices to
+        test case scores. ``submission_num_steps`` has the same layout, with
+        the number of evaluations of the residual of the single diode equation
+        used to find the intersections of each test case in place of its score.
     """
-    # get xs and ys for known and fitted curves
-    known_xs, known_ys = get_curve(known_curve_params, vth, num_pts, atol)
-    fit_xs, fit_ys = get_curve(fitted_curve_params, vth, num_pts, atol)
+    submission_scores = {directory: {} for directory in fitted_files_directories}
+    submission_num_steps = {directory: {} for directory in fitted_files_directories}
+    case_scores = iter_case_scores(fitted_files_directories, vth, num_pts, atol,
+                                   test_set, known_curves_from_json, executor,
+                                   intersection_method, warm_start, strict_validation,
+                                   fitted_curves)
+    for directory, name, idx, result in case_scores:
+        if isinstance(result, Exception):
+            submission_scores[directory] = result
+            continue
+        score, num_steps = result
+        submission_scores[directory].setdefault(name, {})[idx] = score
+        submission_num_steps[directory].setdefault(name, {})[idx] = num_steps
+    return submission_scores, submission_num_steps
 
-    il, io, rs, rsh, n, ns = known_curve_params
-    single_diode = lambda v, i : il - io * mp.expm1((v + i*rs) / (n * ns * vth)) - ((v + i*rs) / rsh)
 
-    score = 0
+def get_csv_output_paths(fitted_files_directories, csv_output_path, subdirectories=None):
+    r"""
+    Returns the directory where the score CSV files of each submission are
+    written.
 
-    for v, i in zip(fit_xs, fit_ys):
-        # for each point (`v`, `i`) on the fitted curve, find the associated
-        # point on known curve (`new_voltage`, `new_current`)
-        new_voltage = find_x_intersection(single_diode, known_xs, known_ys, v, i, num_pts, atol)
-        new_current = precise.lambert_i_from_v(new_voltage, il, io, rs, rsh, n, vth, ns) # find current associated to new_voltage
+    Parameters
+    ----------
+    fitted_files_directories : list of str
+        Directories that contain fitted parameter CSV files, one per
+        submission.
 
-        # if voltage, current pair not a precise enough solution to single diode equation, make more precise
-        dff = precise.diff_lhs_rhs(new_voltage, new_current, il, io, rs, rsh, n, vth, ns)
-        if abs(dff) > atol:
-            new_current = mp.findroot(lambda y : precise.diff_lhs_rhs(new_voltage, y, il, io, rs, rsh, n, vth, ns), new_current, tol=atol**2)
+    csv_output_path : str
+        Directory where the CSV files will be writen.
 
-        # calculate distance between these points, and add to score
-        score += find_distance(new_voltage, new_current, v, i)
+    subdirectories : bool, optional
+        If True, each submission's CSV files are written to the subdirectory
+        of ``csv_output_path`` with the same name as its fitted files
+        directory. If False, they are written to ``csv_output_path``, which
+        requires a single submission. By default, subdirectories are used
+        when there is more than one submission.
+
+    Returns
+    -------
+    dict
+        A mapping of each directory in ``fitted_files_directories`` to the
+        directory where its CSV files will be written.
+    """
+    if subdirectories is None:
+        subdirectories = len(fitted_files_directories) > 1
+    if not subdirectories:
+        if len(fitted_files_directories) > 1:
+            raise ValueError('the CSV files of more than one submission '
+                             'must be written to subdirectories')
+        return {fitted_files_directories[0]: csv_output_path}
+
+    output_paths = {}
+    for directory in fitted_files_directories:
+        name = os.path.basename(os.path.normpath(directory))
+        output_path = os.path.join(csv_output_path, name)
+        if output_path in output_paths.values():
+            raise ValueError(f'more than one fitted files directory is named \'{name}\'')
+        output_paths[directory] = output_path
+    return output_paths
 
-    return score
 
 
 ########
 # PLOT #
 ########
 
+@utils.timed_stat
 def get_curve(curve_parameters, vth, num_pts, atol):
     r"""
     Gets precise voltage and current pairs for the given curve.
@@ -403,6 +2060,73 @@ def get_curve(curve_parameters, vth, num_pts, atol):
     return vv, ii
 
 
+def get_known_curve(iv_curve_json, curve_parameters, vth, num_pts, atol):
+    r"""
+    Gets precise voltage and current pairs for a known curve from its test set
+    JSON entry, or calculates them with :func:`get_curve` if the entry cannot
+    be used.
+
+    Parameters
+    ----------
+    iv_curve_json : dict or None
+        The known curve's entry in its test set JSON file. (See
+        :func:`utils.read_iv_curve_json`)
+
+    curve_parameters : list
+        A list of parameters representing the known IV curve. Should be passed
+        in the order [il, io, rs, rsh, n, ns].
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    num_pts : int
+        Number of points to get on the given curve.
+
+    atol : float
+        The error of each of the solution pairs found is at most ``atol``.
+        (See :func:`precise.get_precise_i`.) Each solution pair is a point
+        on the curve.
+
+    Returns
+    -------
+    (vv, ii) : tuple
+        ``vv`` and ``ii`` each have ``num_pts`` mpmath floats.
+
+    Notes
+    -----
+    The voltages of :func:`precise.get_precise_i` are evenly spaced from zero
+    to :math:`V_{oc}`, so a curve of ``num_pts`` points is every
+    :math:`k`-th point of the JSON entry's curve when
+    :math:`(\text{len} - 1) = k (\text{num\_pts} - 1)`. The entry is not
+    used if no such :math:`k` exists, or if any of its points are farther
+    from the single diode equation than the rounding of the JSON's decimal
+    strings allows, which means the JSON is stale.
+    """
+    if iv_curve_json is None or num_pts < 2:
+        return get_curve(curve_parameters, vth, num_pts, atol)
+
+    json_num_pts = len(iv_curve_json['Voltages'])
+    if (json_num_pts - 1) % (num_pts - 1) != 0:
+        return get_curve(curve_parameters, vth, num_pts, atol)
+
+    step = (json_num_pts - 1) // (num_pts - 1)
+    vv = [mp.mpmathify(v) for v in iv_curve_json['Voltages'][::step]]
+    ii = [mp.mpmathify(i) for i in iv_curve_json['Currents'][::step]]
+
+    # the JSON's strings have utils.constants()['precision'] decimal places
+    json_atol = 10 ** -(utils.constants()['precision'] - 2)
+    il, io, rs, rsh, n, ns = curve_parameters
+    for v, i in zip(vv, ii):
+        if abs(precise.diff_lhs_rhs(v, i, il, io, rs, rsh, n, vth, ns)) > json_atol:
+            return get_curve(curve_parameters, vth, num_pts, atol)
+
+    return vv, ii
+
+
 def iv_plotter(iv_known, iv_fitted, vth, num_pts, atol, pts=None, plot_lines=True):
     r"""
     Plots the fitted curve (green) and the known curve (cyan).
@@ -497,6 +2221,7 @@ def iv_plotter(iv_known, iv_fitted, vth, num_pts, atol, pts=None, plot_lines=Tru
 
     # plot known curve (known parameters)
     known_xs, known_ys = get_curve(iv_known, vth, num_pts, atol)
+    known_segments = get_curve_segments(known_xs, known_ys)
     plt.plot(known_xs, known_ys, 'cyan')
 
     # plot fitted curve (fitted parameters)
@@ -514,7 +2239,8 @@ def iv_plotter(iv_known, iv_fitted, vth, num_pts, atol, pts=None, plot_lines=Tru
 
         # get intersection point on known curve
         try:
-            new_voltage = find_x_intersection(single_diode, known_xs, known_ys, vp, ip, num_pts, atol)
+            new_voltage = find_x_intersection(single_diode, known_xs, known_ys, vp, ip, num_pts, atol,
+                                              segments=known_segments)
             new_current = precise.lambert_i_from_v(new_voltage, il, io, rs, rsh, n, vth, ns)
         except:
             print("BAD PT @", count)
@@ -573,7 +2299,7 @@ def get_test_sets_to_score(fitted_files_directory, test_set=''):
     return test_sets_to_score
 
 
-def write_test_set_score_per_curve_csvs(scores, csv_output_path):
+def write_test_set_score_per_curve_csvs(scores, csv_output_path, errors=None):
     """
     Writes a CSV file containing a score for each test case in every test set.
 
@@ -585,18 +2311,54 @@ def write_test_set_score_per_curve_csvs(scores, csv_output_path):
 
     csv_output_path : str
         Directory where the CSV files will be writen.
+
+    errors : dict, optional
+        Estimated errors of the scores, in the layout of ``scores``. (See
+        :func:`fast_total_scores`) If given, they are written in an
+        ``estimated_error`` column.
     """
-    csv_columns = ['Index', 'score']
     nstr = utils.mp_nstr_precision_func
     for name, cases in scores.items():
-        with open(f'{csv_output_path}/{name}_scores.csv', 'w') as file:
-            writer = csv.writer(file, delimiter=',')
-            writer.writerow(csv_columns)
+        file, writer = open_test_set_score_csv(name, csv_output_path,
+                                               errors is not None)
+        with file:
             for idx, score in cases.items():
-                writer.writerow([idx, nstr(score)])
+                row = [idx, nstr(score)]
+                if errors is not None:
+                    row.append(mp.nstr(errors[name][idx], 3))
+                writer.writerow(row)
+
+
+def open_test_set_score_csv(test_set_name, csv_output_path, with_errors=False):
+    """
+    Opens the CSV file of a test set's scores for writing, and writes its
+    header. The rows are written with the returned CSV writer as
+    ``[idx, utils.mp_nstr_precision_func(score)]``.
+
+    Parameters
+    ----------
+    test_set_name : str
+        Test set filename (excluding file extensions).
+
+    csv_output_path : str
+        Directory where the CSV file will be writen.
+
+    with_errors : bool, default False
+        Add an ``estimated_error`` column to the header.
+
+    Returns
+    -------
+    (file, writer) : tuple
+        The opened file, which must be closed by the caller, and a
+        ``csv.writer`` of it.
+    """
+    file = open(f'{csv_output_path}/{test_set_name}_scores.csv', 'w')
+    writer = csv.writer(file, delimiter=',')
+    writer.writerow(['Index', 'score'] + (['estimated_error'] if with_errors else []))
+    return file, writer
 
 
-def write_overall_scores_csv(scores, csv_output_path):
+def write_overall_scores_csv(scores, csv_output_path, errors=None):
     """
     Writes a CSV file containing overall scores for each test set.
     An overall score is a sum of the test case scores.
@@ -609,15 +2371,23 @@ def write_overall_scores_csv(scores, csv_output_path):
 
     csv_output_path : str
         Directory where the CSV files will be writen.
+
+    errors : dict, optional
+        Estimated errors of the scores, in the layout of ``scores``. (See
+        :func:`fast_total_scores`) If given, the sum of each test set's errors
+        is written in an ``estimated_error`` column.
     """
-    csv_columns = ['test_set', 'score']
+    csv_columns = ['test_set', 'score'] + (['estimated_error'] if errors is not None else [])
     nstr = utils.mp_nstr_precision_func
     with open(f'{csv_output_path}/overall_scores.csv', 'w') as file:
         writer = csv.writer(file, delimiter=',')
         writer.writerow(csv_columns)
         for name, cases in scores.items():
             test_set_score_sum = sum(s for s in cases.values())
-            writer.writerow([name, nstr(test_set_score_sum)])
+            row = [name, nstr(test_set_score_sum)]
+            if errors is not None:
+                row.append(mp.nstr(sum(errors[name].values()), 3))
+            writer.writerow(row)
 
 
 def get_argparser():
@@ -625,14 +2395,104 @@ def get_argparser():
         description='Measure the distance between IV curves generated from '
                     'the parameters of the single diode equation.'
     )
-    parser.add_argument('fitted_files_directory', type=str,
-                        help='Directory containing fitted parameter CSV files.')
+    parser.add_argument('fitted_files_directories', type=str, nargs='+',
+                        help='Directories containing fitted parameter CSV '
+                             'files, one per submission. The known curves are '
+                             'shared by every submission.')
     parser.add_argument('--test-set', dest='test_set', type=str, default='',
                         help='Name of test set to score.')
     parser.add_argument('--csv-output-path', dest='csv_output_path', type=str,
                         default='.', help='Directory where to write output CSV files.')
+    parser.add_argument('--csv-output-subdirectories', dest='csv_output_subdirectories',
+                        action=argparse.BooleanOptionalAction,
+                        help='Write the CSV files of each submission to the '
+                             'subdirectory of --csv-output-path with the same '
+                             'name as its fitted files directory. This is the '
+                             'default when there is more than one submission.')
+    parser.add_argument('--jobs', dest='jobs', type=int, default=1,
+                        help='Number of processes used to score the test '
+                             'cases of every submission. The scores are the '
+                             'same for any number of processes.')
     parser.add_argument('--plot', action=argparse.BooleanOptionalAction,
                         help='Plot each IV curve fit.')
+    parser.add_argument('--fast', action=argparse.BooleanOptionalAction,
+                        help='Score in float64 instead of with mpmath, which '
+                             'is much faster but only approximate. Each '
+                             "score's estimated error is written in an "
+                             'estimated_error column. Re-run scores that are '
+                             'close to each other without --fast.')
+    parser.add_argument('--intersection-method', dest='intersection_method',
+                        type=str, choices=INTERSECTION_METHODS, default='secant',
+                        help='Method used to find the intersections of the '
+                             'known curves with the lines through the origin '
+                             'and the points of the fitted curves. The scores '
+                             'of halley are NOT compatible with the ones of '
+                             'secant: a test case score can differ by about '
+                             '1, so do not compare or mix them, or switch an '
+                             'existing leaderboard to halley.')
+    parser.add_argument('--warm-start', dest='warm_start',
+                        action=argparse.BooleanOptionalAction,
+                        help='Start finding each intersection from the one '
+                             'found for the previous point of the fitted '
+                             "curve. Requires --intersection-method halley.")
+    parser.add_argument('--strict-validation', dest='strict_validation',
+                        action=argparse.BooleanOptionalAction,
+                        help='Do not score submissions whose fitted '
+                             'parameters are out of physical ranges or give '
+                             'curves far from the known curves. Such '
+                             'submissions are only warned about by default. '
+                             'Submissions with parameters of the wrong sign or '
+                             'a non-integer number of cells in series are '
+                             'never scored.')
+    parser.add_argument('--verbose', action=argparse.BooleanOptionalAction,
+                        help='Print the number of evaluations of the single '
+                             'diode equation used to find the intersections of '
+                             'each test case, and the hit rate of the memo of '
+                             'fitted curves.')
+    parser.add_argument('--adaptive-precision',
+                        action=argparse.BooleanOptionalAction,
+                        help='Start precise calculations at fewer decimal '
+                             'places, and only use more if the results are '
+                             'not precise enough. The number of calculations '
+                             'done at each precision is printed at the end.')
+    parser.add_argument('--curve-cache', dest='curve_cache_dir', type=str,
+                        help='Directory of an on-disk cache of precise IV '
+                             'curves. Curves in the cache are not recalculated. '
+                             '(See precise.py)')
+    parser.add_argument('--curve-cache-max-mb', dest='curve_cache_max_mb',
+                        type=float, default=utils.CURVE_CACHE_MAX_BYTES / 2**20,
+                        help='Size limit of the curve cache in megabytes.')
+    parser.add_argument('--clear-curve-cache',
+                        action=argparse.BooleanOptionalAction,
+                        help='Delete every curve in the curve cache before '
+                             'scoring.')
+    parser.add_argument('--score-cache', dest='score_cache_dir', type=str,
+                        help='Directory of an on-disk cache of test case '
+                             'scores. A test case whose known and fitted '
+                             'parameters were scored before with the same '
+                             'settings is not scored again.')
+    parser.add_argument('--score-cache-max-mb', dest='score_cache_max_mb',
+                        type=float, default=utils.SCORE_CACHE_MAX_BYTES / 2**20,
+                        help='Size limit of the score cache in megabytes. The '
+                             'least recently used scores are deleted first.')
+    parser.add_argument('--clear-score-cache',
+                        action=argparse.BooleanOptionalAction,
+                        help='Delete every score in the score cache before '
+                             'scoring.')
+    parser.add_argument('--stats', dest='stats_path', type=str,
+                        help='Collect counts and times of the numerical work '
+                             'of each test case, and write them to a JSON file '
+                             'at this path.')
+    parser.add_argument('--event-log', dest='event_log_path', type=str,
+                        help='Append the start and end of each test set and '
+                             'test case, with their times, retries, and '
+                             'errors, as lines of JSON to a file at this path, '
+                             "or to stderr if it is '-'.")
+    parser.add_argument('--known-curves-from-json', dest='known_curves_from_json',
+                        action=argparse.BooleanOptionalAction, default=True,
+                        help="Use the known curves in the test sets' JSON "
+                             'files instead of recalculating them, when the '
+                             'JSON files have compatible curves.')
     return parser
 
 
@@ -642,33 +2502,118 @@ def get_argparser():
 
 
 if __name__ == '__main__':
-    args = get_argparser().parse_args()
+    parser = get_argparser()
+    args = parser.parse_args()
+    if args.warm_start and args.intersection_method != 'halley':
+        parser.error('--warm-start requires --intersection-method halley')
+    if args.clear_curve_cache and not args.curve_cache_dir:
+        parser.error('--clear-curve-cache requires --curve-cache')
+    if args.clear_score_cache and not args.score_cache_dir:
+        parser.error('--clear-score-cache requires --score-cache')
 
     # # intersecting curves example
     # iv_known = list(map(mp.mpmathify, [6.0, 3.8500023e-06, 1.6816000000000002, 8832.800000000005, 1.4200000000000004, 72]))
     # iv_fitted = list(map(mp.mpmathify, [4.2, 6.500087e-07, 0.9453, 17881.40000000001, 1.6300000000000006, 72]))
 
-    test_sets_to_score = get_test_sets_to_score(args.fitted_files_directory, args.test_set)
-    scores = {}
-    num_compare_pts = 10
     num_total_pts = 200
     constants = utils.constants()
     vth, atol = constants['vth'], constants['atol']
+    num_compare_pts = constants['num_compare_pts']
+    if args.adaptive_precision:
+        utils.set_adaptive_precision(utils.PRECISION_LADDER)
+    if args.curve_cache_dir:
+        if args.clear_curve_cache:
+            cache.clear_curve_cache(args.curve_cache_dir)
+        utils.set_curve_cache(args.curve_cache_dir,
+                              int(args.curve_cache_max_mb * 2**20))
+    if args.stats_path:
+        utils.set_stats(True)
+    if args.event_log_path:
+        utils.set_event_log(args.event_log_path)
+    if args.score_cache_dir:
+        if args.clear_score_cache:
+            cache.clear_score_cache(args.score_cache_dir)
+        utils.set_score_cache(args.score_cache_dir,
+                              int(args.score_cache_max_mb * 2**20))
+    fitted_files_directories = list(dict.fromkeys(args.fitted_files_directories))
+    csv_output_paths = get_csv_output_paths(fitted_files_directories, args.csv_output_path,
+                                            args.csv_output_subdirectories)
+
+    fitted_curves = FittedCurveMemo(vth, num_compare_pts, atol)
+    submission_errors = {}
+    if args.fast:
+        submission_scores, submission_errors = fast_score_submissions(
+            fitted_files_directories, vth, num_compare_pts, atol, args.test_set
+        )
+        for directory, scores in submission_scores.items():
+            if isinstance(scores, Exception):
+                print(f'Could not score \'{directory}\':', file=sys.stderr)
+                traceback.print_exception(type(scores), scores, scores.__traceback__)
+                continue
+            os.makedirs(csv_output_paths[directory], exist_ok=True)
+            write_test_set_score_per_curve_csvs(scores, csv_output_paths[directory],
+                                                submission_errors[directory])
+    else:
+        submission_scores = {directory: {} for directory in fitted_files_directories}
+        nstr = utils.mp_nstr_precision_func
+        with utils.make_process_pool(args.jobs) as executor, contextlib.ExitStack() as csv_files:
+            # each per-case CSV row is written as soon as its test case is scored,
+            # so an interrupted run still leaves the scores found so far
+            score_csv_writers = {}
+            case_scores = iter_case_scores(fitted_files_directories, vth, num_compare_pts,
+                                           atol, args.test_set, args.known_curves_from_json,
+                                           executor, args.intersection_method,
+                                           args.warm_start, args.strict_validation,
+                                           fitted_curves)
+            for directory, name, idx, result in case_scores:
+                if isinstance(result, Exception):
+                    utils.log_event('submission_error', submission=directory,
+                                    test_set=name, index=idx, error=repr(result))
+                    submission_scores[directory] = result
+                    print(f'Could not score \'{directory}\':', file=sys.stderr)
+                    traceback.print_exception(type(result), result, result.__traceback__)
+                    continue
+                score, num_steps = result
+                submission_scores[directory].setdefault(name, {})[idx] = score
+                if args.verbose:
+                    print(f'{directory} {name} {idx}: {num_steps} intersection evaluations')
+
+                if (directory, name) not in score_csv_writers:
+                    os.makedirs(csv_output_paths[directory], exist_ok=True)
+                    file, writer = open_test_set_score_csv(name, csv_output_paths[directory])
+                    score_csv_writers[(directory, name)] = csv_files.enter_context(file), writer
+                file, writer = score_csv_writers[(directory, name)]
+                writer.writerow([idx, nstr(score)])
+                file.flush()
+
+    if args.verbose and not args.fast:
+        print(fitted_curves.format_hit_rate())
+
+    failed = False
+    for directory, scores in submission_scores.items():
+        if isinstance(scores, Exception):
+            failed = True
+            continue
 
-    for name in test_sets_to_score:
-        scores[name] = {}
-        known_parameter_sets = utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
-        fitted_parameter_sets = utils.read_iv_curve_parameter_sets(f'{args.fitted_files_directory}/{name}')
-        for idx, known_p in known_parameter_sets.items():
-            fitted_p = fitted_parameter_sets[idx]
-            scores[name][idx] = total_score(known_p, fitted_p, vth, num_compare_pts, atol)
-
-            if args.plot:
-                fit_xs, fit_ys = get_curve(fitted_p, vth, num_compare_pts, atol)
-                plot = iv_plotter(known_p, fitted_p, vth, num_total_pts, atol,
-                                  pts=list(zip(fit_xs, fit_ys)), plot_lines=True)
-                plt.show()
-                plt.cla()
-
-    write_test_set_score_per_curve_csvs(scores, args.csv_output_path)
-    write_overall_scores_csv(scores, args.csv_output_path)
+        write_overall_scores_csv(scores, csv_output_paths[directory],
+                                 submission_errors.get(directory))
+
+        if args.plot:
+            for name, cases in scores.items():
+                known_parameter_sets = utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
+                fitted_parameter_sets = utils.read_iv_curve_parameter_sets(f'{directory}/{name}')
+                for idx in cases:
+                    known_p, fitted_p = known_parameter_sets[idx], fitted_parameter_sets[idx]
+                    fit_xs, fit_ys = fitted_curves.get(fitted_p)
+                    plot = iv_plotter(known_p, fitted_p, vth, num_total_pts, atol,
+                                      pts=list(zip(fit_xs, fit_ys)), plot_lines=True)
+                    plt.show()
+                    plt.cla()
+
+    if args.adaptive_precision:
+        print(utils.format_precision_escalations(utils.get_precision_escalations()))
+    if args.stats_path:
+        utils.write_stats_json(utils.get_stats(), args.stats_path)
+
+    if failed:
+        sys.exit(1)
@@ -3,9 +3,22 @@ import numpy as np
 import matplotlib.pyplot as plt
 from utils import mp
 import utils
+import cache
+import compact
 import argparse
 import itertools
 import json
+import os
+import pathlib
+import sys
+import textwrap
+
+
+MAX_POWER_PT_METHODS = ('golden', 'newton')
+# the keys of a test set JSON file before its 'IV Curves'
+TEST_SET_JSON_HEADER = {'Manufacturer': '', 'Sandia ID': '', 'Material': ''}
+# largest x such that exp(x) does not overflow float64
+MAX_EXP_ARG = float(np.log(np.finfo(np.float64).max))
 
 
 ###################
@@ -13,7 +26,8 @@ import json
 ###################
 
 
-def max_power_pt_finder(il, io, rs, rsh, n, vth, ns, atol):
+@utils.timed_stat
+def max_power_pt_finder(il, io, rs, rsh, n, vth, ns, atol, method='golden'):
     r"""
     Calculates power at maximum power point.
 
@@ -50,12 +64,19 @@ def max_power_pt_finder(il, io, rs, rsh, n, vth, ns, atol):
         The returned voltage will be at most ``atol`` from the voltage that
         yields the true maximum power of the given IV curve.
 
+    method : str, default 'golden'
+        The method used to find the maximum power point. ``'golden'`` uses
+        :func:`golden_search` and ``'newton'`` uses :func:`newton_search`.
+
     Returns
     -------
     (max_voltage, max_current, max_power) : tuple of mpmath floats
         A good approximation for the voltage :math:`V`, current :math:`I`, and
         power :math:`P` of the maximum power point of the given IV curve.
     """
+    if method not in MAX_POWER_PT_METHODS:
+        raise ValueError(f"'{method}' is not one of {MAX_POWER_PT_METHODS}")
+
     # make parameters mpf types for precision
     il, io, rs, rsh, n, vth = [mp.mpf(str(val)) for val in [il, io, rs, rsh, n, vth]]
 
@@ -79,22 +100,140 @@ def max_power_pt_finder(il, io, rs, rsh, n, vth, ns, atol):
     else:
         iterlimit = 1 + mp.floor( mp.log(atol/(xr - xl)) / mp.log((mp.sqrt(5) - 1) / 2) )
 
-    max_voltage, max_power = golden_search((xl, yl), (xr, yr), power_func, atol, iterlimit)
+    if method == 'newton':
+        # power is zero at both ends of [0, V_oc], and dP/dV changes sign once
+        max_voltage, max_power = newton_search(0, xr, il, io, rs, rsh, n, vth,
+                                               ns, atol)
+    else:
+        max_voltage, max_power = golden_search((xl, yl), (xr, yr), power_func, atol, iterlimit)
 
     # find current associated to max_voltage
-    max_current = lambert_i_from_v(max_voltage, il, io, rs, rsh, n, vth, ns)
+    max_current = utils.adaptive_precision(
+        'max_power_pt_finder',
+        lambda: lambert_i_from_v(max_voltage, il, io, rs, rsh, n, vth, ns),
+        lambda c: abs(diff_lhs_rhs(max_voltage, c, il, io, rs, rsh, n, vth, ns)) <= atol
+    )
 
     # check that current, voltage pair is still a precise solution to single diode eq
     # if not precise enough, make precise using findroot
     dff = diff_lhs_rhs(max_voltage, max_current, il, io, rs, rsh, n, vth, ns)
     if abs(dff) > atol:
-        max_current = mp.findroot(lambda x: diff_lhs_rhs(max_voltage, x, il, io, rs, rsh, n, vth, ns), max_current, tol=atol**2)
+        utils.count_stat('mp.findroot calls')
+        utils.count_retry('findroot refinements')
+        max_current = mp.findroot(lambda x: counted_diff_lhs_rhs(max_voltage, x, il, io, rs, rsh, n, vth, ns), max_current, tol=atol**2)
         # setting tol=atol**2 because findroot checks func(zero)**2 < tol
 
     return max_voltage, max_current, max_power
 
 
 
+########################
+# Newton search method #
+########################
+
+
+def newton_search(left_x_endpt, right_x_endpt, il, io, rs, rsh, n, vth, ns,
+                  atol, maxsteps=100):
+    r"""
+    Uses Newton's method to find the maximum power point of an IV curve by
+    solving :math:`\frac{dP}{dV} = 0`, with at most ``atol`` error.
+
+    The Newton step is safeguarded by an interval where :math:`\frac{dP}{dV}`
+    changes sign. Whenever a step would leave the interval, the interval is
+    bisected instead.
+
+    Parameters
+    ----------
+    left_x_endpt : numeric
+        Left endpoint of interval in which the maximum occurs. The power must
+        be increasing at this voltage. [V]
+
+    right_x_endpt : numeric
+        Right endpoint of interval in which the maximum occurs. The power must
+        be decreasing at this voltage. [V]
+
+    il : numeric
+        Light-generated current :math:`I_L` (photocurrent) [A]
+
+    io : numeric
+        Diode saturation :math:`I_0` current under desired IV curve conditions.
+        [A]
+
+    rs : numeric
+        Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+
+    rsh : numeric
+        Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
+        [ohm]
+
+    n : numeric
+        Diode ideality factor :math:`n`
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    ns : numeric
+        Number of cells in series :math:`N_s`
+
+    atol : float
+        The x-coordinate of the returned point will be at most ``atol`` from the
+        x-coordinate that produces the maximum power.
+
+    maxsteps : int, default 100
+        Maximum number of iterations. Should converge long before we hit this.
+
+    Returns
+    -------
+    tuple of mpmath floats
+        The voltage and power of the maximum power point.
+
+    Notes
+    -----
+    With :math:`I' = \frac{dI}{dV}` and :math:`I'' = \frac{d^2I}{dV^2}` from
+    :func:`single_diode_di_dv`, the derivatives of the power
+    :math:`P = V I` are :math:`P' = I + V I'` and :math:`P'' = 2 I' + V I''`.
+    """
+    xl, xr = mp.mpf(left_x_endpt), mp.mpf(right_x_endpt)
+    nnsvth = n*ns*vth
+
+    # initial guess from the ideal diode approximation of the maximum power
+    # point, V_oc - n Ns Vth log(1 + V_oc/(n Ns Vth))
+    x = xr - nnsvth*mp.log1p(xr/nnsvth)
+    if not (xl < x < xr):
+        x = (xl + xr) / 2
+
+    for _ in range(maxsteps):
+        utils.count_stat('newton_search iterations')
+        i = lambert_i_from_v(x, il, io, rs, rsh, n, vth, ns)
+        di, d2i = single_diode_di_dv(x, i, il, io, rs, rsh, n, vth, ns)
+        dp, d2p = i + x*di, 2*di + x*d2i
+
+        # shrink the interval where dP/dV changes sign
+        if dp > 0:
+            xl = x
+        else:
+            xr = x
+
+        # power is concave near the maximum, so d2p < 0 for a useful step
+        step = -dp / d2p if d2p < 0 else None
+        if step is not None and xl < x + step < xr:
+            x_next = x + step
+        else:
+            x_next = (xl + xr) / 2
+            step = x_next - x
+
+        if abs(step) < atol or (xr - xl) < atol:
+            x = x_next
+            return x, x*lambert_i_from_v(x, il, io, rs, rsh, n, vth, ns)
+        x = x_next
+
+    raise Exception("Iterations exceeded maximum.")
+
+
 ########################
 # Golden search method #
 ########################
@@ -158,6 +297,7 @@ def golden_search(l_endpt, r_endpt, func, atol, iterlimit, int_pt=tuple(), is_ri
     # into the f(int_pt_1) < f(int_pt_2) case) FIXME
 
     if num_iter >= iterlimit: raise Exception("Iterations exceeded maximum.")
+    utils.count_stat('golden_search iterations')
 
     xl, yl = l_endpt
     xr, yr = r_endpt
@@ -259,6 +399,60 @@ def get_right_int_pt(left_x_endpt, right_x_endpt, func):
 #######################
 
 
+def lambertw_exp(coeff, x, maxsteps=100):
+    r"""
+    Calculates :math:`W(c e^x)`, where :math:`W` is the principal branch of the
+    Lambert W function, without calculating :math:`e^x` when it is large.
+
+    Parameters
+    ----------
+    coeff : numeric
+        Positive coefficient :math:`c` of the argument of the Lambert W
+        function.
+
+    x : numeric
+        Exponent :math:`x` of the argument of the Lambert W function.
+
+    maxsteps : int, default 100
+        Maximum number of Newton iterations. Should converge long before we hit
+        this.
+
+    Returns
+    -------
+    mpmath float
+        :math:`W(c e^x)`, with the precision of ``mp.dps``.
+
+    Notes
+    -----
+    If :math:`x` is at most ``MAX_EXP_ARG`` (the largest exponent that does
+    not overflow float64), ``mp.lambertw`` is used directly. Otherwise,
+    :math:`w = W(e^y)` with :math:`y = \log(c) + x` is the root of
+    :math:`f(w) = w + \log(w) - y`, the Wright omega function. Newton's method
+    is started from :math:`y - \log(y)`, which is smaller than the root. Since
+    :math:`f` is increasing and concave, the iterates increase to the root
+    without overshooting it.
+    """
+    if x <= MAX_EXP_ARG:
+        utils.count_stat('mp.lambertw calls')
+        return mp.lambertw(coeff * mp.exp(x)).real
+
+    y = mp.log(coeff) + x
+    if y <= 1:
+        utils.count_stat('mp.lambertw calls')
+        return mp.lambertw(mp.exp(y)).real
+
+    w = y - mp.log(y)
+    for _ in range(maxsteps):
+        utils.count_stat('lambertw_exp iterations')
+        step = (y - w - mp.log(w)) * w / (1 + w)
+        w += step
+        if abs(step) <= w * mp.eps * 4:
+            return w
+
+    raise Exception("Iterations exceeded maximum.")
+
+
+@utils.timed_stat
 def lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns):
     r"""
     Given a voltage, calculates the associated current using the Lambert W
@@ -309,14 +503,16 @@ def lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns):
     """
     gsh = 1. / rsh
     if rs == 0:
+        utils.count_stat('mp.expm1 calls')
         return il - io*mp.expm1(v / (n*vth*ns)) - gsh*v
     else:
-        # handle overflow FIXME
-        argW = rs * io / ((n*vth*ns) * (rs*gsh + 1)) * mp.exp((rs*(il + io) + v)/((n*vth*ns)*(rs*gsh + 1)))
-        lambertw_term = mp.lambertw(argW).real
+        # argW = coeff * exp(x), exp(x) is only formed if it is not too large
+        lambertw_term = lambertw_exp(rs * io / ((n*vth*ns) * (rs*gsh + 1)),
+                                     (rs*(il + io) + v)/((n*vth*ns)*(rs*gsh + 1)))
         return (il + io - v*gsh) / (rs*gsh + 1) - ((n*vth*ns) / rs)*lambertw_term
 
 
+@utils.timed_stat
 def lambert_v_from_i(i, il, io, rs, rsh, n, vth, ns):
     r"""
     Given a current, calculates the associated voltage using the Lambert W
@@ -369,9 +565,9 @@ def lambert_v_from_i(i, il, io, rs, rsh, n, vth, ns):
     if gsh == 0:
         return (n*vth*ns) * mp.log1p((il - i) / io) - i*rs
     else:
-        # handle overflow FIXME
-        argW = io / (gsh * (n*vth*ns)) * mp.exp((-i + il + io) / (gsh * (n*vth*ns)))
-        lambertw_term = mp.lambertw(argW).real
+        # argW = coeff * exp(x), exp(x) is only formed if it is not too large
+        lambertw_term = lambertw_exp(io / (gsh * (n*vth*ns)),
+                                     (-i + il + io) / (gsh * (n*vth*ns)))
         return (il + io - i) / gsh - i*rs - (n*vth*ns)*lambertw_term
 
 
@@ -421,10 +617,170 @@ def diff_lhs_rhs(v, i, il, io, rs, rsh, n, vth, ns):
         Difference between the left hand and right hand sides of the single
         diode equation.
     """
+    utils.count_stat('mp.expm1 calls')
     return (il - io*mp.expm1((v + i*rs)/(n*ns*vth)) - (v + i*rs)/(rsh) - i)
 
 
-def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts):
+def counted_diff_lhs_rhs(v, i, il, io, rs, rsh, n, vth, ns):
+    r"""
+    Calls :func:`diff_lhs_rhs`, counting the call as an ``mp.findroot``
+    evaluation. (See :func:`utils.count_stat`)
+
+    Use it in place of :func:`diff_lhs_rhs` in the functions given to
+    ``mp.findroot``.
+    """
+    utils.count_stat('mp.findroot evaluations')
+    return diff_lhs_rhs(v, i, il, io, rs, rsh, n, vth, ns)
+
+
+def single_diode_di_dv(v, i, il, io, rs, rsh, n, vth, ns):
+    r"""
+    Calculates the first and second derivatives of current with respect to
+    voltage along the IV curve of the single diode equation.
+
+    Parameters
+    ----------
+    v : numeric
+        Voltage [V]
+
+    i : numeric
+        Current associated to ``v`` via the single diode equation [A]
+
+    il : numeric
+        Light-generated current :math:`I_L` (photocurrent) [A]
+
+    io : numeric
+        Diode saturation :math:`I_0` current under desired IV curve conditions.
+        [A]
+
+    rs : numeric
+        Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+
+    rsh : numeric
+        Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
+        [ohm]
+
+    n : numeric
+        Diode ideality factor :math:`n`
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    ns : numeric
+        Number of cells in series :math:`N_s`
+
+    Returns
+    -------
+    (di_dv, d2i_dv2) : tuple of mpmath floats
+        The first and second derivatives of current with respect to voltage.
+
+    Notes
+    -----
+    Differentiating the single diode equation implicitly, with the conductance
+    :math:`g = \frac{I_0}{n N_s V_{th}} \exp \left( \frac{V+I R_s}{n N_s V_{th}}
+    \right) + \frac{1}{R_{sh}}`,
+
+    .. math::
+
+       \frac{dI}{dV} = \frac{-g}{1 + R_s g}
+
+    Since :math:`W(z) e^{W(z)} = z`, this is the same derivative as the one of
+    :func:`lambert_i_from_v`.
+    """
+    nnsvth = n*ns*vth
+    gsh = 1 / mp.mpf(rsh)
+    diode_g = io / nnsvth * mp.exp((v + i*rs) / nnsvth)
+    g = diode_g + gsh
+    di_dv = -g / (1 + rs*g)
+    dg_dv = diode_g * (1 + rs*di_dv) / nnsvth
+    d2i_dv2 = -dg_dv / (1 + rs*g)**2
+    return di_dv, d2i_dv2
+
+
+def diff_lhs_rhs_array(vv, ii, il, io, rs, rsh, n, vth, ns):
+    r"""
+    Calculates the difference between the left hand side and right hand side of
+    the single diode equation for whole arrays of voltages and currents at
+    once, along with a bound on the rounding error of each difference.
+
+    Parameters
+    ----------
+    vv : numpy array of float64
+        Voltages [V]
+
+    ii : numpy array of float64
+        Currents associated to ``vv`` [A]
+
+    il : numeric
+        Light-generated current :math:`I_L` (photocurrent) [A]
+
+    io : numeric
+        Diode saturation :math:`I_0` current under desired IV curve conditions.
+        [A]
+
+    rs : numeric
+        Series resistance :math:`R_s` under desired IV curve conditions. [ohm]
+
+    rsh : numeric
+        Shunt resistance :math:`R_{sh}` under desired IV curve conditions.
+        [ohm]
+
+    n : numeric
+        Diode ideality factor :math:`n`
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    ns : numeric
+        Number of cells in series :math:`N_s`
+
+    Returns
+    -------
+    (diffs, error_bounds) : tuple of numpy arrays
+        ``diffs`` are the differences computed by :func:`diff_lhs_rhs`, but
+        in ``np.longdouble`` arithmetic, and ``error_bounds`` bound how far
+        each of them can be from the difference computed by
+        :func:`diff_lhs_rhs`.
+
+    Notes
+    -----
+    ``np.longdouble`` has 64 bits of mantissa on most x86 platforms, enough
+    to decide whether most differences are smaller than ``1e-16``. Where
+    ``np.longdouble`` is the same as ``np.float64``, the error bounds are too
+    large to decide anything, and the caller should use :func:`diff_lhs_rhs`.
+    """
+    # parameters are mpf with mp.dps digits, convert through strings to keep
+    # all of the digits np.longdouble can hold
+    to_longdouble = lambda x: np.longdouble(mp.nstr(mp.mpf(x), 25))
+    il, io, rs, rsh, nnsvth = map(to_longdouble, [il, io, rs, rsh, n*ns*vth])
+    vv = np.asarray(vv, dtype=np.longdouble)
+    ii = np.asarray(ii, dtype=np.longdouble)
+
+    vd = vv + ii*rs
+    x = vd / nnsvth
+    with np.errstate(over='ignore', invalid='ignore'):
+        diode_term = io*np.expm1(x)
+        diffs = il - diode_term - vd/rsh - ii
+
+        # each operation has a relative error of at most eps; the argument of
+        # expm1 carries its error into the exponential, so scale by (1 + |x|)
+        eps = np.finfo(np.longdouble).eps
+        error_bounds = 8*eps*(np.abs(il) + np.abs(io*np.exp(x))*(1 + np.abs(x))
+                              + np.abs(vd/rsh) + np.abs(ii))
+
+    return diffs, error_bounds
+
+
+@utils.timed_stat
+def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts, vectorize=True):
     r"""
     Calculates precise solutions to the single diode equation for the given
     parameters, with an error of at most ``atol``.
@@ -477,6 +833,13 @@ def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts):
     num_pts : int
         Number of points calculated on IV curve.
 
+    vectorize : bool, default True
+        Check the precision of all of the pvlib solutions at once with
+        :func:`diff_lhs_rhs_array`. Only the solutions it cannot decide are
+        checked with :func:`diff_lhs_rhs`, and only the solutions that are not
+        precise enough are recalculated with :func:`lambert_i_from_v`. The
+        returned solutions are the same as when ``vectorize`` is False.
+
     Returns
     -------
     (vv, precise_i) : tuple of numpy arrays
@@ -488,11 +851,34 @@ def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts):
     Uses :external+pvlib:func:`pvlib.pvsystem.singlediode` to generate solution
     pairs, then uses :func:`lambert_i_from_v` to sharpen the precision of the
     solutions if necessary.
+
+    If the curve cache is on (see :func:`utils.set_curve_cache`), the
+    solutions are loaded from it when it has them, and saved to it otherwise.
     """
+    cache_key = None
+    if utils.get_curve_cache() is not None:
+        cache_key = cache.precise_curve_key(il, io, rs, rsh, n, vth, ns, atol,
+                                            num_pts)
+        cached_curve = cache.load_precise_curve(cache_key)
+        if cached_curve is not None:
+            return cached_curve
+
     # convert mpf to np.float64
     parameters_npfloat64 = map(lambda x: np.float64(x), [il, io, rs, rsh, n*vth*ns])
     res = pvlib.pvsystem.singlediode(*parameters_npfloat64, ivcurve_pnts=num_pts)
 
+    # True if precise enough, False if not, None if it must be checked in mpf
+    precise_enough = [None] * len(res['v'])
+    if vectorize:
+        diffs, error_bounds = diff_lhs_rhs_array(res['v'], res['i'], il, io,
+                                                 rs, rsh, n, vth, ns)
+        atol_longdouble = np.longdouble(mp.nstr(mp.mpf(atol), 25))
+        for idx, (d, b) in enumerate(zip(np.abs(diffs), error_bounds)):
+            if d + b < atol_longdouble:
+                precise_enough[idx] = True
+            elif d - b > atol_longdouble:
+                precise_enough[idx] = False
+
     # convert np.float64 to mpf
     vv = np.fromiter(map(mp.mpmathify, res['v']), dtype=mp.mpf)
     ii = np.fromiter(map(mp.mpmathify, res['i']), dtype=mp.mpf)
@@ -502,10 +888,17 @@ def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts):
     i_precise_enough = lambda c: abs(diff_lhs_rhs(v, c, il, io, rs, rsh, n, vth, ns)) < atol
     for idx, (v, i) in enumerate(zip(vv, ii)):
         # check if i val already precise enough
-        if i_precise_enough(i):
+        if precise_enough[idx] is None:
+            precise_enough[idx] = i_precise_enough(i)
+        if precise_enough[idx]:
             new_i = i
         else:
-            new_i = lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns)
+            utils.count_retry('get_precise_i refined points')
+            new_i = utils.adaptive_precision(
+                'get_precise_i',
+                lambda: lambert_i_from_v(v, il, io, rs, rsh, n, vth, ns),
+                i_precise_enough
+            )
             assert i_precise_enough(new_i), f'Index: {idx}'
 
         # updating array of i's
@@ -519,6 +912,9 @@ def get_precise_i(il, io, rs, rsh, n, vth, ns, atol, num_pts):
     assert vv[0] == 0, f'Must be zero: vv[0] = {vv[0]}'
     assert precise_i[-1] == 0, f'Must be zero: precise_i[-1] = {precise_i[-1]}'
 
+    if cache_key is not None:
+        cache.save_precise_curve(cache_key, vv, precise_i)
+
     return vv, precise_i
 
 
@@ -577,11 +973,230 @@ def plot_iv_curves(test_set_filename, case_parameter_sets, vth, atol, num_pts,
         plt.show()
 
 
+def save_iv_curve_images(test_set_filename, case_parameter_sets, vth, atol,
+                         num_pts, resume=False):
+    """
+    Saves a PNG image of the IV curve of every test case in a test set.
+
+    The keys of the saved images are recorded in a manifest file next to
+    them. (See :func:`write_manifest`)
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the images, excluding the test case indices and the file
+        extension. (See :func:`utils.make_iv_curve_name`)
+
+    case_parameter_sets, vth, atol, num_pts
+        See :func:`plot_iv_curves`.
+
+    resume : bool, default False
+        If True, only the images of test cases whose keys changed since the
+        last run (see :func:`get_image_key`), or which are missing, are
+        saved again, and the images of test cases that were removed from the
+        test set are deleted.
+
+    Returns
+    -------
+    list of int
+        The indices of the test cases whose images were saved.
+    """
+    manifest_path = f'{test_set_filename}.images.manifest.json'
+    keys = {idx: get_image_key(idx, case_parameters, vth, atol, num_pts)
+            for idx, case_parameters in case_parameter_sets.items()}
+    manifest = read_manifest(manifest_path) if resume else {}
+    changed = {
+        idx: case_parameters
+        for idx, case_parameters in case_parameter_sets.items()
+        if (manifest.get(idx) != keys[idx] or not os.path.exists(
+            f'{utils.make_iv_curve_name(test_set_filename, idx)}.png'))
+    }
+    plot_iv_curves(test_set_filename, changed, vth, atol, num_pts, show=False,
+                   savefig=True, stack_plots=False)
+    for idx in manifest.keys() - keys.keys():
+        image_path = f'{utils.make_iv_curve_name(test_set_filename, idx)}.png'
+        pathlib.Path(image_path).unlink(missing_ok=True)
+    write_manifest(manifest_path, keys)
+    return list(changed)
+
+
+def get_image_key(test_idx, case_parameters, vth, atol, num_pts):
+    """
+    Makes the key of a test case's image in a manifest file, which changes
+    whenever its image would. (See :func:`save_iv_curve_images`)
+
+    The parameters are the same as the ones of :func:`get_checkpoint_key`.
+    The key also depends on ``mp.dps`` and the adaptive precision ladder.
+    (See :func:`utils.set_adaptive_precision`)
+
+    Returns
+    -------
+    str
+        The key. (See :func:`cache.make_key`)
+    """
+    return cache.make_key('iv_curve_image', test_idx,
+                          [cache.mpf_to_str(x) for x in case_parameters],
+                          cache.mpf_to_str(vth), cache.mpf_to_str(atol),
+                          int(num_pts), mp.dps, utils.get_precision_ladder())
+
+
+def make_iv_curve_json_entry(test_idx, case_parameters, vth, temp_cell, atol,
+                             num_pts, mpp_method='golden'):
+    """
+    Calculates the IV curve data of a single test case, formatted as an entry
+    of the ``'IV Curves'`` list of a test set JSON file.
+
+    Parameters
+    ----------
+    test_idx : int
+        The Index of the test case.
+
+    case_parameters : list
+        The test case's parameters in the order [il, io, rs, rsh, n, ns].
+        (See :func:`utils.read_iv_curve_parameter_sets`)
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    temp_cell : numeric
+        The test set's cell temperature.
+
+    atol : numeric
+        The absolute tolerance allowed when generating the IV curve data
+        from the test case's parameters.
+
+    num_pts : int
+        Number of points calculated on IV curve.
+
+    mpp_method : str, default 'golden'
+        The method used to find the maximum power point. (See
+        :func:`max_power_pt_finder`)
+
+    Returns
+    -------
+    dict
+        The test case's JSON entry.
+    """
+    il, io, rs, rsh, n, ns = case_parameters
+    vv, ii = get_precise_i(il, io, rs, rsh, n, vth, ns, atol,
+                           num_pts)
+    v_oc = vv.max()
+    i_sc = ii.max()
+    v_mp, i_mp, p_mp = max_power_pt_finder(il, io, rs, rsh, n,
+                                           vth, ns, atol, method=mpp_method)
+
+    nstr = utils.mp_nstr_precision_func
+    vv_str_list = [nstr(x) for x in vv]
+    ii_str_list = [nstr(x) for x in ii]
+    return {
+        'Index': test_idx, 'Voltages': vv_str_list,
+        'Currents': ii_str_list, 'v_oc': nstr(v_oc),
+        'i_sc': nstr(i_sc), 'v_mp': nstr(v_mp),
+        'i_mp': nstr(i_mp), 'p_mp': nstr(p_mp),
+        'cells_in_series': str(int(ns)),
+        'Temperature': mp.nstr(temp_cell, n=5), 'Irradiance': None,
+        'Sweep direction': None, 'Datetime': None
+    }
+
+
+def get_iv_curve_json_entries(case_parameter_sets, vth, temp_cell, atol,
+                              num_pts, executor=None, mpp_method='golden',
+                              test_set_name='', return_exceptions=False):
+    """
+    Calculates the IV curve data of every test case in a test set.
+
+    Parameters
+    ----------
+    case_parameter_sets : dict
+        A mapping of test case indices to a list of test case parameters.
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    temp_cell : numeric
+        The test set's cell temperature.
+
+    atol : numeric
+        The absolute tolerance allowed when generating the IV curve data
+        from the test case's parameters.
+
+    num_pts : int
+        Number of points calculated on IV curve.
+
+    executor : concurrent.futures.Executor, optional
+        If given, every test case is submitted to ``executor`` before this
+        function returns, and the test cases are calculated in parallel.
+        Otherwise, the test cases are calculated one at a time as the
+        returned iterator is consumed.
+
+    mpp_method : str, default 'golden'
+        The method used to find the maximum power point. (See
+        :func:`max_power_pt_finder`)
+
+    test_set_name : str, default ''
+        Name of the test set. If the stats collector is on (see
+        :func:`utils.set_stats`), the stats of each test case are labeled by
+        :func:`utils.make_iv_curve_name` with it. If the event log is on (see
+        :func:`utils.set_event_log`), each test case is logged with it and its
+        Index. (See :func:`utils.call_in_case`)
+
+    return_exceptions : bool, default False
+        If True, the exception raised by a test case is returned in place of
+        its JSON entry, and the other test cases are still calculated.
+
+    Returns
+    -------
+    iterator of dict
+        The test cases' JSON entries (see :func:`make_iv_curve_json_entry`),
+        in the order of ``case_parameter_sets``.
+    """
+    indices = list(case_parameter_sets.keys())
+    cases = [{'label': utils.make_iv_curve_name(test_set_name, idx),
+              'test_set': test_set_name, 'index': idx} for idx in indices]
+    args = [cases, itertools.repeat(make_iv_curve_json_entry),
+            indices, [case_parameter_sets[idx] for idx in indices],
+            itertools.repeat(vth), itertools.repeat(temp_cell),
+            itertools.repeat(atol), itertools.repeat(num_pts),
+            itertools.repeat(mpp_method)]
+    if return_exceptions:
+        args = [itertools.repeat(utils.call_in_case)] + args
+        func = utils.call_returning_exception
+    else:
+        func = utils.call_in_case
+    if executor is None:
+        return map(func, *args)
+    # Executor.map submits every call immediately and yields the results in
+    # the order of its arguments
+    results = executor.map(utils.call_collecting_worker_counters,
+                           itertools.repeat(func), *args)
+    return utils.merge_worker_counters(results)
+
+
 def write_test_set_json(test_set_filename, case_parameter_sets, vth, temp_cell,
-                        atol, num_pts):
+                        atol, num_pts, executor=None, iv_curves=None,
+                        mpp_method='golden', finished_entries=None):
     """
     Write JSON files of IV curve data.
 
+    The JSON entry of each test case is also saved to a checkpoint file next
+    to the JSON file as soon as it is calculated. (See
+    :func:`get_checkpoint_path`) A test case that raises an exception is
+    recorded in the checkpoint file and left out of the JSON file, and the
+    other test cases are still calculated.
+
+    Once the JSON file is written, the keys of its test cases are saved to a
+    manifest file next to it (see :func:`get_manifest_path`), and the
+    checkpoint file is deleted if no test case failed. A later run can skip
+    the test cases that are unchanged. (See :func:`read_finished_entries`)
+
     Parameters
     ----------
     test_set_filename : str
@@ -607,32 +1222,376 @@ def write_test_set_json(test_set_filename, case_parameter_sets, vth, temp_cell,
 
     num_pts : int
         Number of points calculated on IV curve.
+
+    executor : concurrent.futures.Executor, optional
+        Calculates the test cases in parallel. (See
+        :func:`get_iv_curve_json_entries`)
+
+    iv_curves : iterable of dict, optional
+        The JSON entries of the test cases not in ``finished_entries``, if
+        they were already requested with :func:`get_iv_curve_json_entries`
+        with ``return_exceptions=True``. If given, ``executor`` is ignored.
+
+    mpp_method : str, default 'golden'
+        The method used to find the maximum power point. (See
+        :func:`max_power_pt_finder`)
+
+    finished_entries : dict, optional
+        JSON entries of test cases finished by an earlier run, which are not
+        calculated again. (See :func:`read_finished_entries`) If given, the
+        checkpoint file is appended to instead of overwritten.
+
+    Returns
+    -------
+    dict
+        A mapping of the indices of the test cases that failed to their
+        exceptions' representations.
+
+    Notes
+    -----
+    Each test case is written as soon as it is calculated, and only one is
+    held in memory at a time, besides ``finished_entries``. (See
+    :func:`dump_test_set_json`)
+
+    If the event log is on (see :func:`utils.set_event_log`), the test set
+    and each of its test cases are logged. (See :func:`utils.logged_test_set`
+    and :func:`get_iv_curve_json_entries`)
     """
-    case_test_suite = {'Manufacturer': '', 'Sandia ID': '', 'Material': '',
-                       'IV Curves': []}
-    for test_idx, (il, io, rs, rsh, n, ns) in case_parameter_sets.items():
-        vv, ii = get_precise_i(il, io, rs, rsh, n, vth, ns, atol,
-                               num_pts)
-        v_oc = vv.max()
-        i_sc = ii.max()
-        v_mp, i_mp, p_mp = max_power_pt_finder(il, io, rs, rsh, n,
-                                               vth, ns, atol)
-
-        nstr = utils.mp_nstr_precision_func
-        vv_str_list = [nstr(x) for x in vv]
-        ii_str_list = [nstr(x) for x in ii]
-        case_test_suite['IV Curves'].append({
-            'Index': test_idx, 'Voltages': vv_str_list,
-            'Currents': ii_str_list, 'v_oc': nstr(v_oc),
-            'i_sc': nstr(i_sc), 'v_mp': nstr(v_mp),
-            'i_mp': nstr(i_mp), 'p_mp': nstr(p_mp),
-            'cells_in_series': str(int(ns)),
-            'Temperature': mp.nstr(temp_cell, n=5), 'Irradiance': None,
-            'Sweep direction': None, 'Datetime': None
-        })
-
-    with open(f'{test_set_filename}.json', 'w') as file:
-        json.dump(case_test_suite, file, indent=2)
+    test_set_name = pathlib.Path(test_set_filename).name
+    checkpoint_path = get_checkpoint_path(test_set_filename)
+    keys = get_checkpoint_keys(case_parameter_sets, vth, temp_cell, atol,
+                               num_pts, mpp_method)
+    if finished_entries is None:
+        finished_entries, checkpoint_mode = {}, 'w'
+    else:
+        checkpoint_mode = 'a'
+    failures = {}
+    with utils.logged_test_set(test_set=test_set_name,
+                               num_cases=len(case_parameter_sets)):
+        if iv_curves is None:
+            iv_curves = get_iv_curve_json_entries(
+                {idx: p for idx, p in case_parameter_sets.items()
+                 if idx not in finished_entries},
+                vth, temp_cell, atol, num_pts, executor, mpp_method,
+                test_set_name, return_exceptions=True
+            )
+        iv_curves = iter(iv_curves)
+
+        def checkpointed_entries(checkpoint):
+            for idx in case_parameter_sets:
+                if idx in finished_entries:
+                    yield finished_entries[idx]
+                    continue
+                entry = next(iv_curves)
+                record = {'Index': idx, 'key': keys[idx]}
+                if isinstance(entry, Exception):
+                    failures[idx] = record['error'] = repr(entry)
+                else:
+                    record['entry'] = entry
+                checkpoint.write(json.dumps(record) + '\n')
+                checkpoint.flush()
+                if 'entry' in record:
+                    yield entry
+
+        # write to a temporary file first so that the entries of an earlier
+        # run are not lost if this one is stopped. It has a single file
+        # extension, so that it does not add a test set to
+        # utils.get_filenames_in_directory
+        tmp_path = pathlib.Path(f'{test_set_filename}.tmp')
+        try:
+            with (open(checkpoint_path, checkpoint_mode) as checkpoint,
+                  open(tmp_path, 'w') as file):
+                dump_test_set_json(checkpointed_entries(checkpoint), file)
+            os.replace(tmp_path, f'{test_set_filename}.json')
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    write_manifest(get_manifest_path(test_set_filename),
+                   {idx: key for idx, key in keys.items() if idx not in failures})
+    if not failures:
+        os.remove(checkpoint_path)
+    return failures
+
+
+def get_checkpoint_path(test_set_filename):
+    """
+    Returns the path of the checkpoint file of a test set JSON file written
+    by :func:`write_test_set_json`.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    Returns
+    -------
+    str
+        The path of the checkpoint file. It has one line of JSON per test case
+        calculated, with its ``'Index'``, its ``'key'`` (see
+        :func:`get_checkpoint_key`), and either its JSON ``'entry'`` or the
+        ``'error'`` it raised. It has a single file extension, so that it
+        does not add a test set to :func:`utils.get_filenames_in_directory`.
+    """
+    return f'{test_set_filename}.checkpoint'
+
+
+def get_checkpoint_key(test_idx, case_parameters, vth, temp_cell, atol, num_pts,
+                       mpp_method='golden'):
+    """
+    Makes the key of a test case in a checkpoint or manifest file, which
+    changes whenever its JSON entry would. (See
+    :func:`make_iv_curve_json_entry`)
+
+    The parameters are the same as the ones of
+    :func:`make_iv_curve_json_entry`. The key also depends on ``mp.dps`` and
+    the adaptive precision ladder. (See :func:`utils.set_adaptive_precision`)
+
+    Returns
+    -------
+    str
+        The key. (See :func:`cache.make_key`)
+    """
+    return cache.make_key('iv_curve_json_entry', test_idx,
+                          [cache.mpf_to_str(x) for x in case_parameters],
+                          cache.mpf_to_str(vth), cache.mpf_to_str(temp_cell),
+                          cache.mpf_to_str(atol), int(num_pts), mpp_method,
+                          mp.dps, utils.get_precision_ladder())
+
+
+def get_checkpoint_keys(case_parameter_sets, vth, temp_cell, atol, num_pts,
+                        mpp_method='golden'):
+    """
+    Makes the key of every test case in a test set. (See
+    :func:`get_checkpoint_key`)
+
+    The parameters are the same as the ones of :func:`write_test_set_json`.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to their keys.
+    """
+    return {idx: get_checkpoint_key(idx, case_parameters, vth, temp_cell, atol,
+                                    num_pts, mpp_method)
+            for idx, case_parameters in case_parameter_sets.items()}
+
+
+def read_checkpoint(test_set_filename, keys):
+    """
+    Reads the JSON entries of the test cases finished by an earlier run of
+    :func:`write_test_set_json` from its checkpoint file.
+
+    Only the entries of test cases whose keys are unchanged are returned, so
+    a test case is calculated again if its parameters or the settings
+    changed. Test cases that failed are not returned either, so they are
+    tried again.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    keys : dict
+        A mapping of test case indices to their current keys. (See
+        :func:`get_checkpoint_keys`)
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to their JSON entries. It is empty if
+        there is no checkpoint file.
+    """
+    finished_entries = {}
+    try:
+        with open(get_checkpoint_path(test_set_filename), 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # the last line of a killed run may be partial
+                idx = record['Index']
+                if keys.get(idx) != record['key']:
+                    continue
+                if 'entry' in record:
+                    finished_entries[idx] = record['entry']
+                else:
+                    # a later record of a test case replaces earlier ones
+                    finished_entries.pop(idx, None)
+    except FileNotFoundError:
+        pass
+    return finished_entries
+
+
+def get_manifest_path(test_set_filename):
+    """
+    Returns the path of the manifest file of a test set JSON file written by
+    :func:`write_test_set_json`.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    Returns
+    -------
+    str
+        The path of the manifest file. (See :func:`write_manifest`) It has a
+        single file extension, so that it does not add a test set to
+        :func:`utils.get_filenames_in_directory`.
+    """
+    return f'{test_set_filename}.manifest'
+
+
+def read_manifest(manifest_path):
+    """
+    Reads a manifest file written by :func:`write_manifest`.
+
+    Parameters
+    ----------
+    manifest_path : str
+        Path of the manifest file.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to their keys. It is empty if the
+        manifest file does not exist or is not valid JSON.
+    """
+    try:
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {int(idx): key for idx, key in manifest.items()}
+
+
+def write_manifest(manifest_path, keys):
+    """
+    Writes a manifest file, which records the keys of the test cases saved by
+    a run, so that a later run only recalculates the test cases whose keys
+    changed.
+
+    Parameters
+    ----------
+    manifest_path : str
+        Path of the manifest file.
+
+    keys : dict
+        A mapping of test case indices to their keys.
+    """
+    with open(manifest_path, 'w') as file:
+        json.dump({str(idx): key for idx, key in keys.items()}, file, indent=2)
+
+
+def read_finished_entries(test_set_filename, case_parameter_sets, vth,
+                          temp_cell, atol, num_pts, mpp_method='golden'):
+    """
+    Reads the JSON entries of the test cases that do not need to be
+    calculated again by :func:`write_test_set_json`.
+
+    These are the test cases of the existing JSON file whose keys in its
+    manifest file are unchanged (see :func:`get_manifest_path`), and the
+    test cases finished by a run that was stopped. (See
+    :func:`read_checkpoint`) So after changing a few rows of a test set CSV
+    file, only those test cases are calculated again.
+
+    Parameters
+    ----------
+    test_set_filename : str
+        The path of the JSON file, excluding its file extension.
+
+    case_parameter_sets, vth, temp_cell, atol, num_pts, mpp_method
+        See :func:`write_test_set_json`.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to their JSON entries.
+    """
+    keys = get_checkpoint_keys(case_parameter_sets, vth, temp_cell, atol,
+                               num_pts, mpp_method)
+    manifest = read_manifest(get_manifest_path(test_set_filename))
+    finished_entries = {}
+    if any(manifest.get(idx) == key for idx, key in keys.items()):
+        try:
+            with open(f'{test_set_filename}.json', 'r') as file:
+                iv_curves = json.load(file)['IV Curves']
+        except (FileNotFoundError, json.JSONDecodeError):
+            iv_curves = []
+        for entry in iv_curves:
+            idx = entry['Index']
+            if idx in keys and manifest.get(idx) == keys[idx]:
+                finished_entries[idx] = entry
+    finished_entries.update(read_checkpoint(test_set_filename, keys))
+    return finished_entries
+
+
+def dump_test_set_json(iv_curves, file):
+    """
+    Writes a test set JSON file one test case at a time.
+
+    The file is the same as ``json.dump(case_test_suite, file, indent=2)``
+    writes for the whole test set, but each test case is written as soon as
+    ``iv_curves`` yields it, so only one is held in memory at a time.
+
+    Parameters
+    ----------
+    iv_curves : iterable of dict
+        The test cases' JSON entries. (See :func:`make_iv_curve_json_entry`)
+
+    file : file object
+        The text file to write to.
+    """
+    # the header without its closing brace, so the entries can follow it
+    file.write(json.dumps(TEST_SET_JSON_HEADER, indent=2)[:-2])
+    file.write(',\n  "IV Curves": [')
+    separator = '\n'
+    for entry in iv_curves:
+        # an entry in the list is indented two levels deeper than on its own
+        file.write(separator)
+        file.write(textwrap.indent(json.dumps(entry, indent=2), ' ' * 4))
+        file.flush()
+        separator = ',\n'
+    file.write('\n  ]\n}' if separator == ',\n' else ']\n}')
+
+
+def warm_curve_cache(case_parameter_sets, vth, atol, num_pts_list,
+                     executor=None):
+    """
+    Calculates the IV curves of every test case of a test set, so that they
+    are saved to the curve cache. (See :func:`utils.set_curve_cache`)
+
+    Parameters
+    ----------
+    case_parameter_sets : dict
+        A mapping of test case indices to a list of test case parameters.
+
+    vth : numeric
+        Thermal voltage of the cell :math:`V_{th}` [V]
+        The thermal voltage of the cell (in volts) may be calculated as
+        :math:`k_B T_c / q`, where :math:`k_B` is Boltzmann's constant (J/K),
+        :math:`T_c` is the temperature of the p-n junction in Kelvin, and
+        :math:`q` is the charge of an electron (coulombs).
+
+    atol : numeric
+        The absolute tolerance allowed when generating the IV curve data
+        from the test case's parameters.
+
+    num_pts_list : list of int
+        Numbers of points calculated on each IV curve. A curve is cached for
+        each number.
+
+    executor : concurrent.futures.Executor, optional
+        If given, the curves are calculated in parallel.
+    """
+    args = [(il, io, rs, rsh, n, vth, ns, atol, num_pts)
+            for il, io, rs, rsh, n, ns in case_parameter_sets.values()
+            for num_pts in num_pts_list]
+    if not args:
+        return
+    mapper = executor.map if executor is not None else map
+    for _ in mapper(get_precise_i, *zip(*args)):
+        pass
 
 
 def get_argparser():
@@ -649,11 +1608,67 @@ def get_argparser():
                         help='Saves the test set IV curve plots at the given path.')
     parser.add_argument('--plot', action=argparse.BooleanOptionalAction,
                         help="Plot each test set's IV curves")
+    parser.add_argument('--jobs', dest='jobs', type=int, default=1,
+                        help='Number of processes used to generate the test '
+                             'cases of the test set JSONs. The JSONs are the '
+                             'same for any number of processes.')
+    parser.add_argument('--mpp-method', dest='mpp_method', type=str,
+                        choices=MAX_POWER_PT_METHODS, default='golden',
+                        help='Method used to find the maximum power point of '
+                             'each IV curve.')
+    parser.add_argument('--adaptive-precision',
+                        action=argparse.BooleanOptionalAction,
+                        help='Start precise calculations at fewer decimal '
+                             'places, and only use more if the results are '
+                             'not precise enough. The number of calculations '
+                             'done at each precision is printed at the end.')
+    parser.add_argument('--curve-cache', dest='curve_cache_dir', type=str,
+                        help='Directory of an on-disk cache of precise IV '
+                             'curves. Curves in the cache are not recalculated.')
+    parser.add_argument('--curve-cache-max-mb', dest='curve_cache_max_mb',
+                        type=float, default=utils.CURVE_CACHE_MAX_BYTES / 2**20,
+                        help='Size limit of the curve cache in megabytes. The '
+                             'least recently used curves are deleted first.')
+    parser.add_argument('--clear-curve-cache',
+                        action=argparse.BooleanOptionalAction,
+                        help='Delete every curve in the curve cache before '
+                             'doing anything else.')
+    parser.add_argument('--warm-curve-cache',
+                        action=argparse.BooleanOptionalAction,
+                        help='Calculate and cache the curves of each test '
+                             "set's test cases, with as many points as both "
+                             'precise.py and compare_curves.py use.')
+    parser.add_argument('--stats', dest='stats_path', type=str,
+                        help='Collect counts and times of the numerical work '
+                             'of each test case, and write them to a JSON file '
+                             'at this path.')
+    parser.add_argument('--save-compact', action=argparse.BooleanOptionalAction,
+                        help='With --save-json, also write a compact binary '
+                             'companion of each JSON file, which '
+                             'compare_curves.py loads faster. The JSON files '
+                             'stay the canonical format.')
+    parser.add_argument('--resume', action=argparse.BooleanOptionalAction,
+                        help='Only calculate the test cases whose parameters '
+                             'or settings changed since the last run, or '
+                             'which it did not finish, and splice them into '
+                             'the existing JSON files and images. Uses the '
+                             'manifest and checkpoint files saved next to '
+                             'them.')
+    parser.add_argument('--event-log', dest='event_log_path', type=str,
+                        help='Append the start and end of each test set and '
+                             'test case, with their times, retries, and '
+                             'errors, as lines of JSON to a file at this path, '
+                             "or to stderr if it is '-'.")
     return parser
 
 
 if __name__ == '__main__':
-    args = get_argparser().parse_args()
+    parser = get_argparser()
+    args = parser.parse_args()
+    if args.clear_curve_cache and not args.curve_cache_dir:
+        parser.error('--clear-curve-cache requires --curve-cache')
+    if args.warm_curve_cache and not args.curve_cache_dir:
+        parser.error('--warm-curve-cache requires --curve-cache')
 
     if args.test_set_filename:
         test_set_filenames = [args.test_set_filename]
@@ -663,14 +1678,76 @@ if __name__ == '__main__':
     constants = utils.constants()
     vth, temp_cell, atol, num_pts = (constants['vth'], constants['temp_cell'],
                                      constants['atol'], constants['num_pts'])
-    for name in test_set_filenames:
-        case_parameter_sets = utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
+    if args.adaptive_precision:
+        utils.set_adaptive_precision(utils.PRECISION_LADDER)
+    if args.stats_path:
+        utils.set_stats(True)
+    if args.event_log_path:
+        utils.set_event_log(args.event_log_path)
+    if args.curve_cache_dir:
+        if args.clear_curve_cache:
+            cache.clear_curve_cache(args.curve_cache_dir)
+        utils.set_curve_cache(args.curve_cache_dir,
+                              int(args.curve_cache_max_mb * 2**20))
+    case_parameter_sets = {
+        name: utils.read_iv_curve_parameter_sets(f'{utils.TEST_SETS_DIR}/{name}')
+        for name in test_set_filenames
+    }
+
+    with utils.make_process_pool(args.jobs) as executor:
+        if args.warm_curve_cache:
+            for name in test_set_filenames:
+                warm_curve_cache(case_parameter_sets[name], vth, atol,
+                                 [constants['num_compare_pts'], num_pts],
+                                 executor)
+
+        iv_curves, finished_entries, failures = {}, {}, {}
         if args.save_json_path:
-            write_test_set_json(f'{args.save_json_path}/{name}', case_parameter_sets, vth, temp_cell, atol, num_pts)
-        if args.save_images_path:
-            plot_iv_curves(f'{args.save_images_path}/{name}',
-                           case_parameter_sets, vth, atol, num_pts, show=False,
-                           savefig=True, stack_plots=False)
-        if args.plot:
-            plot_iv_curves(name, case_parameter_sets, vth, atol, num_pts)
+            # submit the test cases of every test set before waiting on any
+            for name in test_set_filenames:
+                finished_entries[name] = None
+                if args.resume:
+                    finished_entries[name] = read_finished_entries(
+                        f'{args.save_json_path}/{name}', case_parameter_sets[name],
+                        vth, temp_cell, atol, num_pts, args.mpp_method
+                    )
+                iv_curves[name] = get_iv_curve_json_entries(
+                    {idx: p for idx, p in case_parameter_sets[name].items()
+                     if idx not in (finished_entries[name] or {})},
+                    vth, temp_cell, atol, num_pts, executor, args.mpp_method,
+                    name, return_exceptions=True
+                )
+
+        for name in test_set_filenames:
+            if args.save_json_path:
+                failures[name] = write_test_set_json(
+                    f'{args.save_json_path}/{name}', case_parameter_sets[name],
+                    vth, temp_cell, atol, num_pts, iv_curves=iv_curves[name],
+                    mpp_method=args.mpp_method,
+                    finished_entries=finished_entries[name]
+                )
+                for idx, error in failures[name].items():
+                    print(f'Could not calculate {name} {idx}: {error}',
+                          file=sys.stderr)
+                if args.save_compact:
+                    try:
+                        compact.write_compact_test_set(f'{args.save_json_path}/{name}')
+                    except ValueError as e:
+                        # the JSON file is still usable without its companion
+                        print(f'Skipped the compact file of {name}: {e}',
+                              file=sys.stderr)
+            if args.save_images_path:
+                save_iv_curve_images(f'{args.save_images_path}/{name}',
+                                     case_parameter_sets[name], vth, atol,
+                                     num_pts, resume=args.resume)
+            if args.plot:
+                plot_iv_curves(name, case_parameter_sets[name], vth, atol,
+                               num_pts)
+
+    if args.adaptive_precision:
+        print(utils.format_precision_escalations(utils.get_precision_escalations()))
+    if args.stats_path:
+        utils.write_stats_json(utils.get_stats(), args.stats_path)
 
+    if any(failures.values()):
+        sys.exit(1)
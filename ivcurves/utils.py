@@ -1,6 +1,13 @@
 import os
+import sys
 import csv
+import json
+import time
 import pathlib
+import functools
+import contextlib
+import collections
+import concurrent.futures
 from mpmath import mp
 
 
@@ -8,6 +15,28 @@ TEST_SETS_DIR = f'{pathlib.Path(__file__).parent}/../test_sets'
 IV_PARAMETER_NAMES = ['photocurrent', 'saturation_current',
                       'resistance_series', 'resistance_shunt', 'n',
                       'cells_in_series']
+# working precisions (mp.dps) tried in order by adaptive_precision
+PRECISION_LADDER = (20, 30, 40, 60)
+
+# default size limit of the curve cache (see set_curve_cache)
+CURVE_CACHE_MAX_BYTES = 256 * 2**20
+# default size limit of the score cache (see set_score_cache)
+SCORE_CACHE_MAX_BYTES = 64 * 2**20
+
+# adaptive precision is off unless set_adaptive_precision is called
+_precision_ladder = None
+_precision_escalations = collections.Counter()
+# the curve cache is off unless set_curve_cache is called
+_curve_cache = None
+# the score cache is off unless set_score_cache is called
+_score_cache = None
+# the stats collector is off unless set_stats is called
+_stats = None
+_stats_case = None
+# the event log is off unless set_event_log is called
+_event_log = None
+_event_log_file = None
+_retries = collections.Counter()
 
 
 def set_globals():
@@ -31,6 +60,7 @@ def constants():
     Commonly used constants of the ivcurves scripts.
     """
     num_pts = 100
+    num_compare_pts = 10
     precision = 16
     atol = mp.mpmathify(1e-16)
 
@@ -39,7 +69,8 @@ def constants():
     vth = (k * temp_cell) / q
 
     return {'k': k, 'q': q, 'temp_cell': temp_cell, 'vth': vth, 'atol': atol,
-            'precision': precision, 'num_pts': num_pts}
+            'precision': precision, 'num_pts': num_pts,
+            'num_compare_pts': num_compare_pts}
 
 
 def mp_num_digits_left_of_decimal(num_mpf):
@@ -120,6 +151,181 @@ def read_iv_curve_parameter_sets(filename):
         return mapping
 
 
+def read_iv_curve_json(filename):
+    r"""
+    Returns a dictionary of indices to the IV curve entries of a test set
+    JSON file written by :func:`precise.write_test_set_json`.
+
+    Parameters
+    ----------
+    filename : str
+        The path to a test set JSON file. The path must exclude the file
+        extension.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to the test cases' entries in the
+        ``'IV Curves'`` list. The mapping is empty if the file does not exist.
+    """
+    try:
+        with open(f'{filename}.json', 'r') as file:
+            test_set_json = json.load(file)
+    except FileNotFoundError:
+        return {}
+    return {int(entry['Index']): entry for entry in test_set_json['IV Curves']}
+
+
+def get_iv_curve_json_index_path(filename):
+    r"""
+    Returns the path of the cached offset index of a test set JSON file.
+    (See :func:`read_iv_curve_json_index`)
+
+    Parameters
+    ----------
+    filename : str
+        The path to a test set JSON file. The path must exclude the file
+        extension.
+
+    Returns
+    -------
+    str
+        The path of the index file. It has a single file extension, so that
+        it does not add a test set to :func:`get_filenames_in_directory`.
+    """
+    return f'{filename}.index'
+
+
+def build_iv_curve_json_index(filename):
+    r"""
+    Finds the byte range of every entry of the ``'IV Curves'`` list of a test
+    set JSON file.
+
+    Parameters
+    ----------
+    filename : str
+        The path to a test set JSON file. The path must exclude the file
+        extension.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to ``(start, end)`` byte offsets of
+        their entries in the file.
+    """
+    with open(f'{filename}.json', 'rb') as file:
+        # latin-1 maps each byte to one character, so the positions in the
+        # text are byte offsets. JSON's structural characters are ASCII.
+        text = file.read().decode('latin-1')
+
+    decoder = json.JSONDecoder()
+    whitespace = ' \t\n\r'
+
+    def skip(pos, chars=''):
+        while pos < len(text) and text[pos] in whitespace + chars:
+            pos += 1
+        return pos
+
+    index = {}
+    pos = skip(0)
+    if text[pos:pos + 1] != '{':
+        raise ValueError(f'{filename}.json is not a JSON object')
+    pos = skip(pos + 1)
+    while text[pos:pos + 1] != '}':
+        key, pos = decoder.raw_decode(text, pos)
+        pos = skip(pos, ':')
+        if key != 'IV Curves':
+            _, pos = decoder.raw_decode(text, pos)
+            pos = skip(pos, ',')
+            continue
+        pos = skip(pos, '[')
+        while text[pos:pos + 1] != ']':
+            entry, end = decoder.raw_decode(text, pos)
+            index[int(entry['Index'])] = (pos, end)
+            pos = skip(end, ',')
+        pos = skip(pos + 1, ',')
+    return index
+
+
+def read_iv_curve_json_index(filename):
+    r"""
+    Returns the offset index of a test set JSON file made by
+    :func:`build_iv_curve_json_index`.
+
+    The index is cached in a file next to the JSON file (see
+    :func:`get_iv_curve_json_index_path`), and is built again if the JSON
+    file's size or modification time changed.
+
+    Parameters
+    ----------
+    filename : str
+        The path to a test set JSON file. The path must exclude the file
+        extension.
+
+    Returns
+    -------
+    dict
+        A mapping of test case indices to ``(start, end)`` byte offsets of
+        their entries in the file.
+    """
+    stat = os.stat(f'{filename}.json')
+    index_path = get_iv_curve_json_index_path(filename)
+    try:
+        with open(index_path, 'r') as file:
+            cached = json.load(file)
+        if (cached['size'], cached['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return {int(idx): tuple(offsets)
+                    for idx, offsets in cached['offsets'].items()}
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    index = build_iv_curve_json_index(filename)
+    try:
+        with open(index_path, 'w') as file:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'offsets': {str(idx): offsets
+                                   for idx, offsets in index.items()}}, file)
+    except OSError:
+        pass # the index is only a cache
+    return index
+
+
+def load_case(filename, index):
+    r"""
+    Returns one IV curve entry of a test set JSON file written by
+    :func:`precise.write_test_set_json`, parsing only that entry.
+
+    Parameters
+    ----------
+    filename : str
+        The path to a test set JSON file. The path must exclude the file
+        extension.
+
+    index : int
+        The Index of the test case.
+
+    Returns
+    -------
+    dict
+        The test case's entry in the ``'IV Curves'`` list. (See
+        :func:`read_iv_curve_json`)
+
+    Raises
+    ------
+    KeyError
+        If the test set has no test case with Index ``index``.
+
+    Notes
+    -----
+    The byte range of the entry is found with
+    :func:`read_iv_curve_json_index`.
+    """
+    start, end = read_iv_curve_json_index(filename)[int(index)]
+    with open(f'{filename}.json', 'rb') as file:
+        file.seek(start)
+        return json.loads(file.read(end - start).decode())
+
+
 def make_iv_curve_name(test_set_name, index):
     r"""
     Returns a unique name for an IV curve created from parameters of
@@ -156,5 +362,686 @@ def get_filenames_in_directory(directory_path):
     return {entry.stem for entry in pathlib.Path(directory_path).iterdir()}
 
 
+def set_worker_globals(dps, precision_ladder, curve_cache, stats=False,
+                       event_log=None):
+    r"""
+    Sets the precision of mpmath calculations to ``dps`` decimal places, the
+    adaptive precision ladder to ``precision_ladder``, the curve cache to
+    ``curve_cache``, turns the stats collector on if ``stats`` is True, and
+    sets the event log to ``event_log``.
+
+    This is the initializer of the worker processes made by
+    :func:`make_process_pool`, so that the workers use the same precision
+    settings as the process that made them.
+
+    Parameters
+    ----------
+    dps : int
+        Number of decimal places.
+
+    precision_ladder : tuple of int or None
+        See :func:`set_adaptive_precision`.
+
+    curve_cache : tuple or None
+        The ``(cache_dir, max_bytes)`` arguments of :func:`set_curve_cache`,
+        or None if the curve cache is off.
+
+    stats : bool, default False
+        See :func:`set_stats`.
+
+    event_log : str, optional
+        See :func:`set_event_log`.
+    """
+    mp.dps = dps
+    set_adaptive_precision(precision_ladder)
+    set_curve_cache(*(curve_cache or (None,)))
+    set_stats(stats)
+    set_event_log(event_log)
+
+
+def set_curve_cache(cache_dir, max_bytes=CURVE_CACHE_MAX_BYTES):
+    r"""
+    Turns the on-disk cache of precise IV curves on or off. (See
+    :func:`precise.get_precise_i` and :mod:`cache`)
+
+    Parameters
+    ----------
+    cache_dir : str or None
+        Directory of the cache. If None, the cache is turned off.
+
+    max_bytes : int, default CURVE_CACHE_MAX_BYTES
+        Size limit of the cache. The least recently used curves are deleted
+        when the cache grows larger.
+    """
+    global _curve_cache
+    _curve_cache = (cache_dir, max_bytes) if cache_dir else None
+
+
+def get_curve_cache():
+    r"""
+    Returns the curve cache settings.
+
+    Returns
+    -------
+    tuple or None
+        ``(cache_dir, max_bytes)``, or None if the curve cache is off.
+    """
+    return _curve_cache
+
+
+def set_score_cache(cache_dir, max_bytes=SCORE_CACHE_MAX_BYTES):
+    r"""
+    Turns the on-disk cache of test case scores on or off. (See
+    :func:`compare_curves.iter_case_scores` and :mod:`cache`)
+
+    Parameters
+    ----------
+    cache_dir : str or None
+        Directory of the cache. If None, the cache is turned off.
+
+    max_bytes : int, default SCORE_CACHE_MAX_BYTES
+        Size limit of the cache. The least recently used scores are deleted
+        when the cache grows larger.
+    """
+    global _score_cache
+    _score_cache = (cache_dir, max_bytes) if cache_dir else None
+
+
+def get_score_cache():
+    r"""
+    Returns the score cache settings.
+
+    Returns
+    -------
+    tuple or None
+        ``(cache_dir, max_bytes)``, or None if the score cache is off.
+    """
+    return _score_cache
+
+
+def set_adaptive_precision(precision_ladder=PRECISION_LADDER):
+    r"""
+    Turns adaptive precision on or off for :func:`adaptive_precision`.
+
+    Parameters
+    ----------
+    precision_ladder : tuple of int or None, default PRECISION_LADDER
+        Increasing numbers of decimal places to try calculations at. If None,
+        adaptive precision is turned off and calculations use ``mp.dps``.
+
+    Notes
+    -----
+    A result found at fewer decimal places passes the same check at
+    ``mp.dps`` as one found at ``mp.dps``, so the two differ by less than the
+    tolerance of the check, ``atol``. The smallest precision of
+    ``PRECISION_LADDER`` has enough digits beyond ``atol`` that the test set
+    JSON files and the scores are unchanged.
+    """
+    global _precision_ladder
+    _precision_ladder = tuple(precision_ladder) if precision_ladder else None
+
+
+def adaptive_precision(label, func, is_precise_enough):
+    r"""
+    Calls ``func`` at the cheapest working precision of the adaptive precision
+    ladder whose result is precise enough.
+
+    If adaptive precision is off (see :func:`set_adaptive_precision`),
+    ``func`` is called once at ``mp.dps``.
+
+    Parameters
+    ----------
+    label : str
+        Name of the calculation, used to count precision escalations. (See
+        :func:`get_precision_escalations`)
+
+    func : function
+        Calculation with no arguments. An exception it raises at any working
+        precision but the largest of the ladder counts as a result that is
+        not precise enough, such as ``mp.findroot`` not meeting its tolerance.
+
+    is_precise_enough : function
+        Takes the result of ``func`` and returns True if it is precise enough.
+        It is called at ``mp.dps``, not at the working precision of ``func``.
+
+    Returns
+    -------
+    The result of ``func`` at the cheapest precision that was precise enough,
+    or at the largest precision of the ladder if none were. The caller should
+    check the result as it would without adaptive precision.
+    """
+    if _precision_ladder is None:
+        return func()
+
+    for num_tries, dps in enumerate(_precision_ladder):
+        if num_tries > 0:
+            count_retry('precision escalations')
+        try:
+            with mp.workdps(dps):
+                result = func()
+        except Exception:
+            if num_tries == len(_precision_ladder) - 1:
+                _precision_escalations[(label, 'failed')] += 1
+                raise
+            continue
+        if is_precise_enough(result):
+            _precision_escalations[(label, dps)] += 1
+            return result
+    _precision_escalations[(label, 'failed')] += 1
+    return result
+
+
+def get_precision_escalations():
+    r"""
+    Returns the number of calculations of :func:`adaptive_precision` that
+    were precise enough at each working precision.
+
+    Returns
+    -------
+    collections.Counter
+        A copy of the counts, keyed by ``(label, dps)``. ``dps`` is
+        ``'failed'`` for calculations that were not precise enough at any
+        working precision.
+    """
+    return collections.Counter(_precision_escalations)
+
+
+def get_precision_ladder():
+    r"""
+    Returns the adaptive precision ladder.
+
+    Returns
+    -------
+    tuple of int or None
+        The ladder set by :func:`set_adaptive_precision`, or None if adaptive
+        precision is off.
+    """
+    return _precision_ladder
+
+
+def add_precision_escalations(counts):
+    r"""
+    Adds counts of precision escalations, such as the ones returned by
+    :func:`call_counting_precision_escalations` in a worker process.
+
+    Parameters
+    ----------
+    counts : collections.Counter
+        Counts keyed by ``(label, dps)``.
+    """
+    _precision_escalations.update(counts)
+
+
+def call_counting_precision_escalations(func, *args):
+    r"""
+    Calls ``func`` and also returns the precision escalations counted during
+    the call. (See :func:`add_precision_escalations`)
+
+    Parameters
+    ----------
+    func : function
+        The function to call with ``args``.
+
+    Returns
+    -------
+    (result, counts) : tuple
+        The result of ``func`` and a ``collections.Counter`` of the precision
+        escalations counted during the call.
+    """
+    before = get_precision_escalations()
+    result = func(*args)
+    return result, get_precision_escalations() - before
+
+
+def call_collecting_worker_counters(func, *args):
+    r"""
+    Calls ``func`` and also returns the precision escalations and stats
+    counted during the call, so they can be sent from a worker process to the
+    process that made it. (See :func:`add_worker_counters`)
+
+    Parameters
+    ----------
+    func : function
+        The function to call with ``args``.
+
+    Returns
+    -------
+    (result, counters) : tuple
+        The result of ``func``, and a tuple of a ``collections.Counter`` of
+        the precision escalations counted during the call (see
+        :func:`call_counting_precision_escalations`) and the stats collected
+        during the call, or None if the stats collector is off. (See
+        :func:`get_stats`)
+    """
+    stats_before = get_stats()
+    result, escalations = call_counting_precision_escalations(func, *args)
+    stats = None if stats_before is None else get_stats() - stats_before
+    return result, (escalations, stats)
+
+
+def add_worker_counters(counters):
+    r"""
+    Adds the precision escalations and stats returned by
+    :func:`call_collecting_worker_counters` in a worker process to this
+    process's. (See :func:`add_precision_escalations` and :func:`add_stats`)
+
+    Parameters
+    ----------
+    counters : tuple
+        The ``(escalations, stats)`` of
+        :func:`call_collecting_worker_counters`.
+    """
+    escalations, stats = counters
+    add_precision_escalations(escalations)
+    add_stats(stats)
+
+
+def merge_worker_counters(results):
+    r"""
+    Yields the results of :func:`call_collecting_worker_counters` calls made
+    in worker processes, adding their counters to this process's.
+
+    Parameters
+    ----------
+    results : iterable of tuple
+        ``(result, counters)`` pairs returned by
+        :func:`call_collecting_worker_counters`.
+
+    Yields
+    ------
+    The results, in the order of ``results``.
+    """
+    for result, counters in results:
+        add_worker_counters(counters)
+        yield result
+
+
+def format_precision_escalations(counts):
+    r"""
+    Formats counts of precision escalations as lines of text.
+
+    Parameters
+    ----------
+    counts : collections.Counter
+        Counts keyed by ``(label, dps)``.
+
+    Returns
+    -------
+    str
+        One ``'{label} dps={dps}: {count}'`` line per key, sorted by label and
+        increasing precision.
+    """
+    order = lambda key: (key[0], key[1] == 'failed', str(key[1]).zfill(4))
+    return '\n'.join(f'{label} dps={dps}: {counts[(label, dps)]}'
+                     for label, dps in sorted(counts, key=order))
+
+
+def set_stats(enabled):
+    r"""
+    Turns the stats collector on or off, clearing the stats collected so far.
+
+    When it is on, calls to the functions decorated with :func:`timed_stat`
+    are counted and timed, and :func:`count_stat` counts. When it is off,
+    they cost a single check.
+
+    Parameters
+    ----------
+    enabled : bool
+        Turn the stats collector on.
+    """
+    global _stats
+    _stats = collections.Counter() if enabled else None
+
+
+def get_stats():
+    r"""
+    Returns the stats collected so far.
+
+    Returns
+    -------
+    collections.Counter or None
+        A copy of the stats keyed by ``(case, name)``, where ``case`` is the
+        label of the test case they were collected in (see
+        :func:`stats_case`), or None if the stats collector is off.
+    """
+    return None if _stats is None else collections.Counter(_stats)
+
+
+def add_stats(stats):
+    r"""
+    Adds stats, such as the ones collected in a worker process. (See
+    :func:`call_collecting_worker_counters`)
+
+    Parameters
+    ----------
+    stats : collections.Counter or None
+        Stats keyed by ``(case, name)``.
+    """
+    if _stats is not None and stats is not None:
+        _stats.update(stats)
+
+
+def count_stat(name, num=1):
+    r"""
+    Adds ``num`` to the stat ``name`` of the current test case, if the stats
+    collector is on. (See :func:`set_stats`)
+
+    Parameters
+    ----------
+    name : str
+        Name of the stat, such as ``'mp.lambertw calls'``.
+
+    num : numeric, default 1
+        The amount to add.
+    """
+    if _stats is not None:
+        _stats[(_stats_case, name)] += num
+
+
+def timed_stat(func):
+    r"""
+    Decorates ``func`` so that, if the stats collector is on, its calls are
+    counted in the stat ``'{func.__name__} calls'`` and the seconds spent in
+    them in ``'{func.__name__} seconds'``. The seconds of nested calls are
+    included in the seconds of the calls they are nested in.
+
+    Parameters
+    ----------
+    func : function
+        The function to decorate.
+
+    Returns
+    -------
+    function
+    """
+    calls_name, seconds_name = f'{func.__name__} calls', f'{func.__name__} seconds'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _stats is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            count_stat(calls_name)
+            count_stat(seconds_name, time.perf_counter() - start)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def stats_case(label):
+    r"""
+    Collects the stats of the calculations in the ``with`` block under the
+    test case ``label``.
+
+    Parameters
+    ----------
+    label : str
+        Label of the test case, such as one made by
+        :func:`make_iv_curve_name`.
+    """
+    global _stats_case
+    previous_case, _stats_case = _stats_case, label
+    try:
+        yield
+    finally:
+        _stats_case = previous_case
+
+
+def call_in_case(case, func, *args):
+    r"""
+    Calls ``func`` with ``args`` as the calculation of a test case: its stats
+    are collected under :func:`stats_case` ``case['label']``, and its events
+    are logged by :func:`logged_case`. This works in worker processes too.
+
+    Parameters
+    ----------
+    case : dict
+        ``'label'``, the test case's label in the stats, and the fields
+        identifying it in the event log, such as ``'test_set'`` and
+        ``'index'``. The label is not logged. A ``'kind'`` names the events
+        instead of ``'case'``. (See :func:`logged_case`)
+
+    Returns
+    -------
+    The result of ``func``.
+    """
+    fields = {key: value for key, value in case.items() if key != 'label'}
+    with stats_case(case['label']), logged_case(**fields):
+        return func(*args)
+
+
+def call_returning_exception(func, *args):
+    r"""
+    Calls ``func`` with ``args``, returning the exception it raises instead of
+    raising it, so that one failing test case does not stop the others.
+
+    Returns
+    -------
+    The result of ``func``, or the ``Exception`` it raised.
+    """
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
+
+
+def format_stats(stats):
+    r"""
+    Formats stats as a JSON-serializable dictionary.
+
+    Parameters
+    ----------
+    stats : collections.Counter
+        Stats keyed by ``(case, name)``. (See :func:`get_stats`)
+
+    Returns
+    -------
+    dict
+        ``'total'``, the sum of each stat over every test case, and
+        ``'cases'``, a dictionary of test case labels to their stats. Stats
+        collected outside of any test case are labeled ``'other'``. The
+        test cases are in the order their first stats were collected in.
+    """
+    total, cases = collections.Counter(), {}
+    for (case, name), value in stats.items():
+        total[name] += value
+        cases.setdefault('other' if case is None else str(case), {})[name] = value
+    return {'total': dict(sorted(total.items())),
+            'cases': {case: dict(sorted(case_stats.items()))
+                      for case, case_stats in cases.items()}}
+
+
+def write_stats_json(stats, filename):
+    r"""
+    Writes stats to a JSON file. (See :func:`format_stats`)
+
+    Parameters
+    ----------
+    stats : collections.Counter
+        Stats keyed by ``(case, name)``.
+
+    filename : str
+        Path of the JSON file.
+    """
+    with open(filename, 'w') as file:
+        json.dump(format_stats(stats), file, indent=2)
+
+
+def set_event_log(path):
+    r"""
+    Turns the event log on or off. When it is on, :func:`log_event` appends
+    events to it as lines of JSON.
+
+    Parameters
+    ----------
+    path : str or None
+        Path of the event log file, or ``'-'`` to log to stderr. If None, the
+        event log is turned off.
+    """
+    global _event_log, _event_log_file
+    if _event_log_file is not None and _event_log_file is not sys.stderr:
+        _event_log_file.close()
+    _event_log = path
+    if path is None:
+        _event_log_file = None
+    elif path == '-':
+        _event_log_file = sys.stderr
+    else:
+        # every process appends its own whole lines, so worker processes can
+        # log to the same file
+        _event_log_file = open(path, 'a')
+
+
+def get_event_log():
+    r"""
+    Returns the path of the event log, ``'-'`` for stderr, or None if it is
+    off.
+    """
+    return _event_log
+
+
+def log_event(event, **fields):
+    r"""
+    Appends an event to the event log, if it is on. (See
+    :func:`set_event_log`)
+
+    Parameters
+    ----------
+    event : str
+        Name of the event, such as ``'case_start'``.
+
+    fields
+        JSON-serializable fields of the event. Other values are converted to
+        strings.
+
+    Notes
+    -----
+    Each event is a JSON object on its own line, with the keys ``'event'``,
+    ``'time'`` (seconds since the epoch), ``'pid'`` (the process that logged
+    it), and ``fields``.
+    """
+    if _event_log_file is None:
+        return
+    record = {'event': event, 'time': time.time(), 'pid': os.getpid(), **fields}
+    _event_log_file.write(json.dumps(record, default=str) + '\n')
+    _event_log_file.flush()
+
+
+def count_retry(name):
+    r"""
+    Counts a calculation that was retried, such as with more precision or
+    another method, in the stat ``name`` (see :func:`count_stat`) and in the
+    retries of the current :func:`logged_case`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the retry, such as ``'precision escalations'``.
+    """
+    count_stat(name)
+    if _event_log_file is not None:
+        _retries[name] += 1
+
+
+@contextlib.contextmanager
+def logged_case(kind='case', **fields):
+    r"""
+    Logs the calculation of a test case in the ``with`` block to the event
+    log, if it is on. (See :func:`log_event`)
+
+    A ``'case_start'`` event is logged when the block is entered. When it is
+    exited, a ``'case_end'`` event is logged, or a ``'case_error'`` event with
+    the exception's ``'error'`` if it raised one. Both have the block's
+    ``'wall_seconds'`` and ``'cpu_seconds'`` (of this process), and its
+    ``'retries'``. (See :func:`count_retry`)
+
+    Parameters
+    ----------
+    kind : str, default 'case'
+        The prefix of the events' names, such as ``'fitted_curve'`` for
+        ``'fitted_curve_start'`` events.
+
+    fields
+        Fields identifying the test case, added to every event.
+    """
+    if _event_log_file is None:
+        yield
+        return
+    log_event(f'{kind}_start', **fields)
+    retries_before = collections.Counter(_retries)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    except Exception as e:
+        log_event(f'{kind}_error', **fields, **_get_times(wall_start, cpu_start),
+                  retries=dict(_retries - retries_before), error=repr(e))
+        raise
+    log_event(f'{kind}_end', **fields, **_get_times(wall_start, cpu_start),
+              retries=dict(_retries - retries_before))
+
+
+def _get_times(wall_start, cpu_start):
+    return {'wall_seconds': time.perf_counter() - wall_start,
+            'cpu_seconds': time.process_time() - cpu_start}
+
+
+@contextlib.contextmanager
+def logged_test_set(**fields):
+    r"""
+    Logs the work on a test set in the ``with`` block to the event log, if it
+    is on, with ``'test_set_start'`` and ``'test_set_end'`` or
+    ``'test_set_error'`` events. (See :func:`logged_case`)
+
+    Parameters
+    ----------
+    fields
+        Fields identifying the test set, added to every event.
+    """
+    if _event_log_file is None:
+        yield
+        return
+    log_event('test_set_start', **fields)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    except Exception as e:
+        log_event('test_set_error', **fields, **_get_times(wall_start, cpu_start),
+                  error=repr(e))
+        raise
+    log_event('test_set_end', **fields, **_get_times(wall_start, cpu_start))
+
+
+def make_process_pool(jobs):
+    r"""
+    Makes a pool of worker processes to run the ivcurves calculations in
+    parallel.
+
+    The workers use the precision, adaptive precision, curve cache, stats
+    collector, and event log settings of this process. (See :func:`set_worker_globals`)
+
+    Parameters
+    ----------
+    jobs : int
+        Number of worker processes. If ``jobs`` is less than two, no pool is
+        made.
+
+    Returns
+    -------
+    context manager
+        Enters a ``concurrent.futures.ProcessPoolExecutor`` with ``jobs``
+        workers, or ``None`` if ``jobs`` is less than two.
+    """
+    if jobs is None or jobs < 2:
+        return contextlib.nullcontext()
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=set_worker_globals,
+        initargs=(mp.dps, _precision_ladder, _curve_cache, _stats is not None,
+                  _event_log)
+    )
+
+
 set_globals()
 